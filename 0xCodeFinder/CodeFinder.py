@@ -1,5 +1,16 @@
+import argparse
+import heapq
+import json
 import os
+import re
+import shutil
+import sqlite3
 import sys
+import tarfile
+import tempfile
+import zipfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 
 
 class Colors:
@@ -28,45 +39,1006 @@ def print_header(text):
     print("=" * 60 + f"{Colors.RESET}\n")
 
 
-def is_binary_file(file_path):
-    """判断文件是否为二进制文件（含空字节则视为二进制）"""
-    try:
-        with open(file_path, 'rb') as f:
-            return b'\x00' in f.read(1024)
-    except Exception:
-        return True
+# 关键词数量不超过该值时逐个关键词用 bytes.find 查找，超过时改用 Aho-Corasick 自动机
+FAST_PATH_MAX_KEYWORDS = 32
+
+
+class KeywordMatcher:
+    """多关键词匹配器：每次运行只构建一次，找出字节内容中命中的全部关键词
+
+    关键词较少时（交互搜索的常见情况）对每块内容生成一份 ASCII 小写副本，再逐个关键词用
+    C 实现的 bytes.find 查找；关键词很多时改用 Aho-Corasick 自动机单次遍历。
+    自动机的大小写折叠在构建阶段完成：ASCII 大写字母与小写字母共用同一条状态转移，
+    非 ASCII 关键词额外登记其大写/小写形式，因此扫描时无需生成小写副本。
+    两种方式匹配的字节模式相同，结果一致。
+
+    扫描状态在分块之间传递（初始状态为 0）：自动机为状态编号，快速路径为上一块末尾
+    不足一个最长模式的字节，因此跨越块边界的关键词在两种方式下都能被找到。
+    """
+
+    def __init__(self, keywords):
+        # 去重并保持用户输入顺序
+        self.keywords = list(dict.fromkeys(kw for kw in keywords if kw))
+
+        # 每个关键词的全部字节模式（与自动机登记的变体相同）
+        self._needles = {
+            keyword: tuple({variant.encode('utf-8').lower()
+                            for variant in (keyword, keyword.lower(), keyword.upper())})
+            for keyword in self.keywords
+        }
+        self._tail = max((len(n) for needles in self._needles.values() for n in needles), default=1) - 1
+        self._fast = len(self.keywords) <= FAST_PATH_MAX_KEYWORDS
+        if self._fast:
+            return
+
+        goto = [{}]
+        outputs = [set()]
+        # 每个终止状态对应的 (关键词, 模式字节长度)，用于计算匹配起始偏移
+        patterns = [set()]
+
+        # 1. 构建字典树（模式串统一为 UTF-8 字节并做 ASCII 小写化）
+        for keyword in self.keywords:
+            for variant in {keyword, keyword.lower(), keyword.upper()}:
+                state = 0
+                encoded = variant.encode('utf-8').lower()
+                for byte in encoded:
+                    if byte not in goto[state]:
+                        goto.append({})
+                        outputs.append(set())
+                        patterns.append(set())
+                        goto[state][byte] = len(goto) - 1
+                    state = goto[state][byte]
+                outputs[state].add(keyword)
+                patterns[state].add((keyword, len(encoded)))
+
+        # 2. 按广度优先顺序计算失败指针，并展开为完整的状态转移表
+        fail = [0] * len(goto)
+        delta = [dict(goto[0])] + [None] * (len(goto) - 1)
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            outputs[state] |= outputs[fail[state]]
+            patterns[state] |= patterns[fail[state]]
+            # 继承失败状态的转移，再用自身的转移覆盖
+            delta[state] = dict(delta[fail[state]])
+            for byte, child in goto[state].items():
+                fail[child] = delta[fail[state]].get(byte, 0) if state else 0
+                delta[state][byte] = child
+                queue.append(child)
+
+        # 3. ASCII 大写字母复用小写字母的转移，实现扫描时零成本的大小写折叠
+        for table in delta:
+            for byte in [b for b in table if 0x61 <= b <= 0x7a]:
+                table[byte - 0x20] = table[byte]
+
+        self._delta = delta
+        self._outputs = [frozenset(out) for out in outputs]
+        self._patterns = [tuple(sorted(pats)) for pats in patterns]
+
+    def _fast_text(self, data, state):
+        """快速路径：拼接上一块的尾部与本块的小写副本，返回 (文本, 尾部长度, 新状态)"""
+        tail = state or b''
+        text = tail + data.lower() if tail else data.lower()
+        new_state = text[max(len(text) - self._tail, 0):] if self._tail else b''
+        return text, len(tail), new_state
+
+    def feed(self, data, state, found, first_only=False):
+        """从给定状态继续扫描一段字节，命中的关键词累加到 found，返回新的状态
+
+        状态在分块之间延续，因此跨越块边界的关键词同样能被找到，无需重叠读取。
+        """
+        if self._fast:
+            text, _, state = self._fast_text(data, state)
+            for keyword, needles in self._needles.items():
+                if keyword not in found and any(needle in text for needle in needles):
+                    found.add(keyword)
+                    if first_only:
+                        break
+            return state
+
+        delta = self._delta
+        outputs = self._outputs
+        total = len(self.keywords)
+        for byte in data:
+            state = delta[state].get(byte, 0)
+            if outputs[state]:
+                found |= outputs[state]
+                # 全部关键词均已命中（或只需判断是否命中）时提前结束
+                if first_only or len(found) == total:
+                    break
+        return state
+
+    def find_matches(self, data, state, base=0):
+        """从给定状态继续扫描一段字节，返回 (新状态, 匹配列表)
+
+        匹配列表按结束位置排序，元素为 (起始偏移, 结束偏移, 关键词)，偏移均加上 base，
+        因此跨越块边界的匹配会得到位于上一块中的起始偏移。
+        """
+        if self._fast:
+            text, tail, state = self._fast_text(data, state)
+            offset = base - tail
+            found = set()
+            for keyword, needles in self._needles.items():
+                for needle in needles:
+                    pos = text.find(needle)
+                    while pos != -1:
+                        # 完全落在上一块尾部的匹配已在上一次调用中报告过
+                        if pos + len(needle) > tail:
+                            found.add((offset + pos, offset + pos + len(needle), keyword))
+                        pos = text.find(needle, pos + 1)
+            # 与自动机相同的顺序：按结束位置，再按关键词与模式长度
+            matches = sorted(found, key=lambda m: (m[1], m[2], m[1] - m[0]))
+            return state, matches
+
+        delta = self._delta
+        patterns = self._patterns
+        matches = []
+        for pos, byte in enumerate(data):
+            state = delta[state].get(byte, 0)
+            if patterns[state]:
+                end = base + pos + 1
+                for keyword, length in patterns[state]:
+                    matches.append((end - length, end, keyword))
+        return state, matches
+
+    def is_complete(self, found):
+        """判断是否所有关键词都已命中"""
+        return len(found) == len(self.keywords)
+
+    def scan(self, data, first_only=False):
+        """单次遍历字节串，返回命中的关键词集合；first_only 为 True 时命中即返回"""
+        found = set()
+        self.feed(data, 0, found, first_only)
+        return found
+
+
+# 分块读取大小：单个文件搜索时的内存占用上限与文件大小无关
+CHUNK_SIZE = 1024 * 1024
+# 二进制检测只检查首块的前 1024 字节
+BINARY_CHECK_SIZE = 1024
+
+
+def is_binary_chunk(chunk):
+    """判断文件首块是否属于二进制文件（含空字节则视为二进制）"""
+    return b'\x00' in chunk[:BINARY_CHECK_SIZE]
+
+
+def normalize_extensions(extensions):
+    """将后缀列表转换为小写集合，供 matches_file_extension 做集合查找"""
+    return frozenset(ext.lower() for ext in extensions or ())
 
 
 def matches_file_extension(filename, extensions):
-    """检查文件是否匹配指定的后缀"""
+    """检查文件是否匹配指定的后缀（extensions 为 normalize_extensions 返回的集合）"""
     if not extensions:  # 如果没有指定后缀，匹配所有文件
         return True
 
-    # 检查文件是否以任何指定的后缀结尾（不区分大小写）
+    # 依次取文件名中每个点号开始的后缀做集合查找，兼容 .tar.gz 这类多级后缀（不区分大小写）
     filename_lower = filename.lower()
-    for ext in extensions:
-        if filename_lower.endswith(ext.lower()):
+    dot = filename_lower.find('.')
+    while dot != -1:
+        if filename_lower[dot:] in extensions:
             return True
+        dot = filename_lower.find('.', dot + 1)
     return False
 
 
-def search_keywords_in_file(file_path, keywords):
-    """检查文件内容是否包含任意关键词（跳过二进制文件）"""
-    if is_binary_file(file_path):
+# 默认排除的目录（版本库元数据与依赖缓存）
+DEFAULT_EXCLUDES = ['.git/', '.svn/', '.hg/', 'node_modules/', '__pycache__/']
+
+
+def glob_to_regex(pattern):
+    """将 gitignore 风格的通配符转换为正则表达式（* 不跨目录，** 可跨多级目录）"""
+    i, n = 0, len(pattern)
+    parts = []
+    while i < n:
+        if pattern.startswith('**/', i):
+            parts.append('(?:.*/)?')
+            i += 3
+        elif pattern.startswith('**', i):
+            parts.append('.*')
+            i += 2
+        elif pattern[i] == '*':
+            parts.append('[^/]*')
+            i += 1
+        elif pattern[i] == '?':
+            parts.append('[^/]')
+            i += 1
+        elif pattern[i] == '[' and ']' in pattern[i + 1:]:
+            end = pattern.index(']', i + 1)
+            body = pattern[i + 1:end]
+            if body.startswith('!'):
+                body = '^' + body[1:]
+            parts.append('[' + body.replace('\\', '\\\\') + ']')
+            i = end + 1
+        else:
+            parts.append(re.escape(pattern[i]))
+            i += 1
+    return ''.join(parts)
+
+
+class ExcludeRules:
+    """gitignore 风格的排除规则（不支持 ! 取反）
+
+    - 以 / 结尾的规则只匹配目录，例如 node_modules/
+    - 不含 / 的规则匹配任意层级的文件名或目录名，例如 *.min.js
+    - 含 / 的规则匹配相对于搜索根目录的路径，例如 /build、vendor/**/test
+    """
+
+    def __init__(self, patterns):
+        groups = {(False, False): [], (False, True): [], (True, False): [], (True, True): []}
+        for pattern in patterns or ():
+            pattern = pattern.strip().replace('\\', '/')
+            if not pattern or pattern.startswith('#'):
+                continue
+            dir_only = pattern.endswith('/')
+            pattern = pattern.rstrip('/')
+            anchored = '/' in pattern
+            groups[(anchored, dir_only)].append(glob_to_regex(pattern.lstrip('/')))
+        # 同类规则合并为一个正则，每个路径只需匹配常数次
+        self._rules = {key: re.compile('(?:' + '|'.join(regexes) + r')\Z')
+                       for key, regexes in groups.items() if regexes}
+
+    def __bool__(self):
+        return bool(self._rules)
+
+    def excludes(self, rel_path, name, is_dir):
+        """判断相对路径（以 / 分隔）对应的文件或目录是否被排除"""
+        for (anchored, dir_only), regex in self._rules.items():
+            if dir_only and not is_dir:
+                continue
+            if regex.match(rel_path if anchored else name):
+                return True
         return False
 
+
+def walk_files(root_dir, extensions=None, excludes=None, max_size=None, reader=None):
+    """基于 os.scandir 的目录遍历，逐个产出符合条件的文件 DirEntry
+
+    复用 DirEntry 缓存的类型信息，被排除的目录整棵剪枝不再进入；
+    max_size 为文件大小上限（字节），超过的文件直接跳过。
+    reader（ArchiveReader）可进入的压缩包不受后缀与大小过滤，由其对成员过滤。
+    遍历顺序与 os.walk 一致：先当前目录的文件，再依次进入子目录。
+    """
+    extensions = normalize_extensions(extensions)
+    excludes = excludes or ExcludeRules(None)
+    stack = [(root_dir, '')]
+    while stack:
+        dir_path, rel_dir = stack.pop()
+        subdirs = []
+        try:
+            with os.scandir(dir_path) as it:
+                for entry in it:
+                    rel_path = rel_dir + entry.name
+                    try:
+                        is_dir = entry.is_dir(follow_symlinks=False)
+                        if not is_dir and not entry.is_file():
+                            continue
+                    except OSError:
+                        continue
+                    if excludes and excludes.excludes(rel_path, entry.name, is_dir):
+                        continue
+                    if is_dir:
+                        subdirs.append((entry.path, rel_path + '/'))
+                        continue
+                    if reader and reader.is_archive(entry.name):
+                        yield entry
+                        continue
+                    if not matches_file_extension(entry.name, extensions):
+                        continue
+                    if max_size is not None:
+                        try:
+                            if entry.stat().st_size > max_size:
+                                continue
+                        except OSError:
+                            continue
+                    yield entry
+        except OSError:
+            # 无权限等原因无法读取的目录直接跳过（与 os.walk 的默认行为一致）
+            continue
+        stack.extend(reversed(subdirs))
+
+
+class ArchiveReader:
+    """不解压到磁盘，直接以流的方式读取压缩包（zip/jar/war/tar.gz 等）中的成员
+
+    depth 为允许进入的压缩包嵌套层数，0 表示不进入压缩包；压缩包成员的显示路径
+    形如 archive.jar!/path/in/archive，嵌套时依次拼接。成员同样按后缀与大小过滤。
+    """
+
+    ZIP_EXTENSIONS = ('.zip', '.jar', '.war', '.ear', '.aar', '.apk')
+    TAR_EXTENSIONS = ('.tar', '.tar.gz', '.tgz', '.tar.bz2', '.tbz2', '.tar.xz', '.txz')
+    # 流式 tar 中嵌套的 zip 需要随机访问，超过该大小时才会落盘到临时文件
+    SPOOL_MEMORY_LIMIT = 64 * 1024 * 1024
+
+    def __init__(self, depth=0, extensions=None, max_size=None):
+        self.depth = depth
+        self.extensions = normalize_extensions(extensions)
+        self.max_size = max_size
+
+    def is_archive(self, name):
+        """判断文件名是否为可进入的压缩包"""
+        return self.depth > 0 and name.lower().endswith(self.ZIP_EXTENSIONS + self.TAR_EXTENSIONS)
+
+    def open_streams(self, file_path):
+        """产出 (显示路径, 二进制文件对象)：普通文件产出自身，压缩包产出其中的各个成员
+
+        调用方必须在取下一个成员之前读完（或放弃）当前成员。
+        """
+        try:
+            f = open(file_path, 'rb')
+        except OSError:
+            # 无法打开的文件直接跳过
+            return
+        with f:
+            if self.is_archive(os.path.basename(file_path)):
+                yield from self._iter_archive(f, file_path, os.path.basename(file_path), self.depth)
+            else:
+                yield file_path, f
+
+    def _iter_archive(self, f, display_path, name, depth):
+        """遍历一个压缩包中的成员，损坏或无法识别的压缩包只给出提示"""
+        try:
+            if name.lower().endswith(self.ZIP_EXTENSIONS):
+                yield from self._iter_zip(f, display_path, depth)
+            else:
+                yield from self._iter_tar(f, display_path, depth)
+        except (zipfile.BadZipFile, tarfile.TarError, EOFError, OSError, ValueError) as e:
+            print(f"⚠️ 无法读取压缩包: {display_path}（{e}）", file=sys.stderr)
+
+    def _iter_zip(self, f, display_path, depth):
+        if not f.seekable():
+            spooled = tempfile.SpooledTemporaryFile(max_size=self.SPOOL_MEMORY_LIMIT)
+            shutil.copyfileobj(f, spooled)
+            spooled.seek(0)
+            f = spooled
+        with zipfile.ZipFile(f) as zf:
+            for info in zf.infolist():
+                if info.is_dir():
+                    continue
+                with zf.open(info) as member:
+                    yield from self._iter_member(member, f"{display_path}!/{info.filename}",
+                                                 info.filename, info.file_size, depth)
+
+    def _iter_tar(self, f, display_path, depth):
+        # 可随机访问时按普通模式打开，否则（嵌套在其他压缩包中）使用流式模式
+        mode = 'r:*' if f.seekable() else 'r|*'
+        with tarfile.open(fileobj=f, mode=mode) as tf:
+            for info in tf:
+                if not info.isfile():
+                    continue
+                member = tf.extractfile(info)
+                if member is None:
+                    continue
+                member_name = info.name[2:] if info.name.startswith('./') else info.name
+                with member:
+                    yield from self._iter_member(member, f"{display_path}!/{member_name}",
+                                                 member_name, info.size, depth)
+
+    def _iter_member(self, member, display_path, member_name, size, depth):
+        name = member_name.rsplit('/', 1)[-1]
+        if depth > 1 and self.is_archive(name):
+            yield from self._iter_archive(member, display_path, name, depth - 1)
+        elif (matches_file_extension(name, self.extensions)
+              and (self.max_size is None or size <= self.max_size)):
+            yield display_path, member
+
+
+# 不进入压缩包的默认读取器
+PLAIN_READER = ArchiveReader()
+
+
+def search_keywords_in_stream(f, matcher, chunk_size=CHUNK_SIZE):
+    """返回文件对象内容中命中的关键词集合（跳过二进制内容，未命中时为空集合）
+
+    按固定大小分块读取，首块同时用于二进制检测；所有关键词都命中后立即停止读取。
+    """
+    chunk = f.read(chunk_size)
+    if is_binary_chunk(chunk):
+        return set()
+
+    found = set()
+    state = 0
+    while chunk:
+        state = matcher.feed(chunk, state, found)
+        if matcher.is_complete(found):
+            break
+        chunk = f.read(chunk_size)
+    return found
+
+
+def search_keywords_in_file(file_path, matcher, reader=PLAIN_READER, chunk_size=CHUNK_SIZE):
+    """产出 (显示路径, 命中关键词集合)，压缩包会展开为其中的各个成员
+
+    每个文件只打开一次；无法打开的文件与二进制文件一样直接跳过。
+    """
+    display_path = file_path
     try:
-        with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-            content = f.read().lower()
-            return any(keyword.lower() in content for keyword in keywords)
+        for display_path, f in reader.open_streams(file_path):
+            hits = search_keywords_in_stream(f, matcher, chunk_size)
+            if hits:
+                yield display_path, hits
     except Exception as e:
-        print(f"{Colors.RED}⚠️ 无法读取文件: {file_path}{Colors.RESET}")
+        print(f"{Colors.RED}⚠️ 无法读取文件: {display_path}{Colors.RESET}")
         print(f"{Colors.RED}   错误详情: {str(e)}{Colors.RESET}")
-        return False
 
 
-def search_files(root_dir, keywords, extensions):
-    """递归遍历目录，返回含关键词且匹配后缀的文件路径列表"""
+def iter_line_matches(file_path, matcher, max_count=None, files_with_matches=False,
+                      reader=PLAIN_READER, chunk_size=CHUNK_SIZE):
+    """逐个产出文件中的匹配结果字典：path、line（从 1 开始）、offset（字节偏移）、keyword
+
+    max_count 限制单个文件产出的结果数；files_with_matches 为 True 时命中第一处即停止读取。
+    压缩包中的每个成员各自视为一个文件。
+    """
+    for display_path, f in reader.open_streams(file_path):
+        yield from iter_stream_line_matches(f, display_path, matcher, max_count,
+                                            files_with_matches, chunk_size)
+
+
+def iter_stream_line_matches(f, display_path, matcher, max_count=None, files_with_matches=False,
+                             chunk_size=CHUNK_SIZE):
+    """iter_line_matches 针对单个文件对象的实现"""
+    if files_with_matches:
+        max_count = 1
+    count = 0
+    chunk = f.read(chunk_size)
+    if is_binary_chunk(chunk):
+        return
+
+    state = 0
+    base = 0  # 当前块在文件中的起始偏移
+    newlines = 0  # 已统计到 counted 位置之前的换行数
+    counted = 0  # 当前块内已统计换行的位置
+    while chunk:
+        state, matches = matcher.find_matches(chunk, state, base)
+        for start, end, keyword in matches:
+            # 增量统计到匹配结束处的换行数，再扣除关键词自身包含的换行
+            newlines += chunk.count(b'\n', counted, end - base)
+            counted = end - base
+            yield {
+                'path': display_path,
+                'line': newlines - keyword.count('\n') + 1,
+                'offset': start,
+                'keyword': keyword,
+            }
+            count += 1
+            if max_count is not None and count >= max_count:
+                return
+        newlines += chunk.count(b'\n', counted)
+        counted = 0
+        base += len(chunk)
+        chunk = f.read(chunk_size)
+
+
+# 没有换行的超长行累计到块大小的该倍数时强制切分
+LINE_BLOCK_LIMIT = 8
+# 强制切分时相邻两块重叠的字节数，跨越切分点且不超过该长度的匹配仍能被找到
+LINE_BLOCK_OVERLAP = 4096
+
+
+def iter_line_chunks(f, chunk_size=CHUNK_SIZE, overlap=LINE_BLOCK_OVERLAP):
+    """按换行边界分块读取，产出 (块起始偏移, 块内容, 重叠长度)
+
+    未遇到换行的片段先放入列表，遇到换行时才拼接，避免反复复制。单行累计到
+    chunk_size * LINE_BLOCK_LIMIT 仍没有换行时强制切分，下一块以上一块末尾的 overlap
+    字节开头，重叠长度即下一块开头与上一块重复的字节数（其中不含换行），其余情况为 0。
+    因此单块大小有上限，内存占用与行长无关。
+    """
+    max_block = chunk_size * LINE_BLOCK_LIMIT
+    base = 0  # 待处理片段在文件中的起始偏移
+    pieces = []
+    size = 0
+    repeated = 0  # 待处理片段开头与上一块重复的字节数
+    while True:
+        data = f.read(chunk_size)
+        if not data:
+            break
+        cut = data.rfind(b'\n') + 1
+        if cut:
+            pieces.append(data[:cut])
+            block = b''.join(pieces)
+            yield base, block, repeated
+            base += len(block)
+            pieces = [data[cut:]] if cut < len(data) else []
+            size = len(data) - cut
+            repeated = 0
+            continue
+        pieces.append(data)
+        size += len(data)
+        if size >= max_block:
+            block = b''.join(pieces)
+            yield base, block, repeated
+            keep = min(overlap, len(block))
+            base += len(block) - keep
+            pieces = [block[len(block) - keep:]] if keep else []
+            size = repeated = keep
+    if size > repeated:
+        yield base, b''.join(pieces), repeated
+
+
+class RulePack:
+    """规则包：多条正则规则，以字面量预过滤后逐条运行
+
+    规则包为 JSON 或 YAML 文件，格式如下（keywords 为预过滤字面量，不区分大小写）：
+
+        {"rules": [{"id": "aws-access-key", "pattern": "AKIA[0-9A-Z]{16}",
+                    "keywords": ["AKIA"], "ignore_case": false}]}
+
+    文件按换行边界分块，每块先用一个多关键词匹配器扫描全部字面量，没有任何字面量
+    命中的块直接跳过，不运行正则；否则只对命中字面量的规则（及未配置字面量的规则）
+    各自运行其正则，再按偏移合并结果，因此一条规则的匹配内部出现的其它规则的命中
+    同样会被报告。字面量应当是规则匹配内容中必然出现的片段。
+
+    跨行的规则（如 [\s\S]、(?s) 或含 \n 的模式）只能在同一块内匹配：块在换行处切分，
+    每块约 CHUNK_SIZE 字节，跨越块边界的多行匹配会被遗漏；没有换行的超长行按
+    LINE_BLOCK_OVERLAP 字节重叠切分，长度超过重叠区的匹配若恰好跨越切分点同样会被遗漏。
+    """
+
+    def __init__(self, rules):
+        self.rules = []
+        for rule in rules:
+            if 'id' not in rule or 'pattern' not in rule:
+                raise ValueError(f"规则缺少 id 或 pattern 字段: {rule}")
+            pattern = rule['pattern']
+            re.compile(pattern)  # 尽早暴露无效的正则
+            self.rules.append({
+                'id': str(rule['id']),
+                'pattern': pattern,
+                'keywords': [kw for kw in rule.get('keywords', []) if kw],
+                'ignore_case': bool(rule.get('ignore_case', False)),
+            })
+
+        # 字面量 -> 规则序号，所有字面量共用一个自动机
+        self._literal_rules = {}
+        for i, rule in enumerate(self.rules):
+            for keyword in rule['keywords']:
+                self._literal_rules.setdefault(keyword, []).append(i)
+        self._always = tuple(i for i, rule in enumerate(self.rules) if not rule['keywords'])
+        self.literal_matcher = KeywordMatcher(list(self._literal_rules))
+        self._compiled = {}
+
+    @classmethod
+    def load(cls, path):
+        """从 JSON 或 YAML 文件加载规则包（YAML 需要安装 PyYAML）"""
+        with open(path, 'r', encoding='utf-8') as f:
+            if path.lower().endswith(('.yml', '.yaml')):
+                try:
+                    import yaml
+                except ImportError:
+                    raise RuntimeError("加载 YAML 规则包需要先安装 PyYAML: pip install pyyaml")
+                data = yaml.safe_load(f)
+            else:
+                data = json.load(f)
+        rules = data.get('rules', []) if isinstance(data, dict) else data
+        return cls(rules)
+
+    @property
+    def literals(self):
+        """全部预过滤字面量；存在未配置字面量的规则时返回 None（无法用字面量缩小范围）"""
+        if self._always:
+            return None
+        return list(self._literal_rules)
+
+    def candidate_rules(self, found_literals):
+        """根据命中的字面量返回需要运行的规则序号（按规则顺序）"""
+        selected = set(self._always)
+        for keyword in found_literals:
+            selected.update(self._literal_rules[keyword])
+        return tuple(sorted(selected))
+
+    def compiled(self, rule_id):
+        """返回指定规则编译后的字节正则（按需编译并缓存）"""
+        regex = self._compiled.get(rule_id)
+        if regex is None:
+            rule = self.rules[rule_id]
+            flags = re.MULTILINE | (re.IGNORECASE if rule['ignore_case'] else 0)
+            regex = re.compile(rule['pattern'].encode('utf-8'), flags)
+            self._compiled[rule_id] = regex
+        return regex
+
+    def iter_matches(self, rule_ids, data, skip=0):
+        """对一块内容逐条运行指定规则，按 (起始偏移, 规则序号) 合并产出 (规则序号, 匹配对象)
+
+        结束位置不超过 skip 的匹配（完全落在与上一块重叠的区域内，已报告过）被跳过。
+        """
+        streams = [self._iter_rule(i, data, skip) for i in rule_ids]
+        for _, i, match in heapq.merge(*streams, key=lambda item: item[:2]):
+            yield i, match
+
+    def _iter_rule(self, rule_id, data, skip):
+        for match in self.compiled(rule_id).finditer(data):
+            if match.end() > skip:
+                yield match.start(), rule_id, match
+
+    def __getstate__(self):
+        # 编译后的正则缓存在各工作进程中按需重建
+        state = dict(self.__dict__)
+        state['_compiled'] = {}
+        return state
+
+
+def iter_rule_matches(file_path, rule_pack, max_count=None, files_with_matches=False,
+                      reader=PLAIN_READER, chunk_size=CHUNK_SIZE):
+    """逐个产出文件中规则命中的结果字典：path、line、offset、rule、match
+
+    每个文件只读一遍：按换行边界分块，先做字面量预过滤，只对可能命中的块运行候选规则的正则。
+    """
+    for display_path, f in reader.open_streams(file_path):
+        yield from iter_stream_rule_matches(f, display_path, rule_pack, max_count,
+                                            files_with_matches, chunk_size)
+
+
+def iter_stream_rule_matches(f, display_path, rule_pack, max_count=None,
+                             files_with_matches=False, chunk_size=CHUNK_SIZE):
+    """iter_rule_matches 针对单个文件对象的实现"""
+    if files_with_matches:
+        max_count = 1
+    count = 0
+    literal_matcher = rule_pack.literal_matcher
+    newlines = 0
+    first = True
+    for base, chunk, overlap in iter_line_chunks(f, chunk_size):
+        # 首块同时用于二进制检测
+        if first and is_binary_chunk(chunk):
+            return
+        first = False
+
+        rule_ids = rule_pack.candidate_rules(literal_matcher.scan(chunk))
+        if not rule_ids:
+            newlines += chunk.count(b'\n')
+            continue
+
+        counted = 0
+        for i, match in rule_pack.iter_matches(rule_ids, chunk, overlap):
+            newlines += chunk.count(b'\n', counted, match.start())
+            counted = match.start()
+            rule = rule_pack.rules[i]
+            yield {
+                'path': display_path,
+                'line': newlines + 1,
+                'offset': base + match.start(),
+                'rule': rule['id'],
+                'match': match.group().decode('utf-8', errors='replace')[:200],
+            }
+            count += 1
+            if max_count is not None and count >= max_count:
+                return
+        newlines += chunk.count(b'\n', counted)
+
+
+def iter_candidate_files(root_dir, extensions, excludes=None, max_size=None, reader=None):
+    """生产者：递归遍历目录，逐个产出符合过滤条件的文件路径"""
+    for entry in walk_files(root_dir, extensions, excludes, max_size, reader):
+        yield entry.path
+
+
+def iter_batches(iterable, batch_size):
+    """将可迭代对象按固定大小切分为批次列表"""
+    batch = []
+    for item in iterable:
+        batch.append(item)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+# 工作进程内的关键词匹配器与搜索选项，由进程池初始化函数设置，避免每个批次重复传输
+_worker_matcher = None
+_worker_options = {}
+# 流式搜索时每批交给工作进程的文件数
+SEARCH_BATCH_SIZE = 16
+
+
+def init_worker(matcher, options=None):
+    """进程池初始化：在每个工作进程中保存一份匹配器和搜索选项"""
+    global _worker_matcher, _worker_options
+    _worker_matcher = matcher
+    _worker_options = options or {}
+
+
+def search_batch(file_paths):
+    """工作进程：搜索一批文件，返回 (文件路径, 命中关键词) 列表（保持批内顺序）"""
+    reader = _worker_options.get('reader', PLAIN_READER)
+    results = []
+    for path in file_paths:
+        results.extend(search_keywords_in_file(path, _worker_matcher, reader))
+    return results
+
+
+def search_lines_batch(file_paths):
+    """工作进程：逐行搜索一批文件，返回全部匹配结果字典（保持文件与匹配的顺序）"""
+    return collect_batch(iter_line_matches, file_paths)
+
+
+def search_rules_batch(file_paths):
+    """工作进程：用规则包搜索一批文件，返回全部规则命中结果字典"""
+    return collect_batch(iter_rule_matches, file_paths)
+
+
+def collect_batch(iter_matches, file_paths):
+    """对一批文件依次调用 iter_matches，汇总结果"""
+    return list(iter_files_matches(iter_matches, file_paths, _worker_matcher, _worker_options))
+
+
+def iter_files_matches(iter_matches, file_paths, matcher, options):
+    """对文件依次调用 iter_matches 并逐条产出结果；单个文件出错不影响其他文件"""
+    for path in file_paths:
+        try:
+            yield from iter_matches(path, matcher, **options)
+        except Exception as e:
+            print(f"⚠️ 无法读取文件: {path}（{e}）", file=sys.stderr)
+
+
+def run_batches(func, items, jobs=None, batch_size=256, initializer=None, initargs=()):
+    """按批次把 items 交给 func 处理，并按提交顺序流式产出每批结果中的元素
+
+    jobs 为进程数（默认使用全部 CPU 核心），jobs=1 时在当前进程内串行执行。
+    同时在途的批次数限制为 jobs 的若干倍，避免遍历过快导致内存堆积。
+    """
+    jobs = jobs or os.cpu_count() or 1
+
+    if jobs == 1:
+        if initializer:
+            initializer(*initargs)
+        for batch in iter_batches(items, batch_size):
+            yield from func(batch)
+        return
+
+    max_pending = jobs * 4
+    with ProcessPoolExecutor(max_workers=jobs, initializer=initializer,
+                             initargs=initargs) as executor:
+        pending = deque()
+        try:
+            for batch in iter_batches(items, batch_size):
+                pending.append(executor.submit(func, batch))
+                # 在途批次过多时，先按顺序取回最早的结果
+                while len(pending) >= max_pending:
+                    yield from pending.popleft().result()
+            while pending:
+                yield from pending.popleft().result()
+        finally:
+            # 调用方提前结束迭代时，取消尚未开始的批次，尽快退出进程池
+            for future in pending:
+                future.cancel()
+
+
+def parallel_search(file_paths, matcher, jobs=None, batch_size=256, reader=PLAIN_READER):
+    """并行搜索引擎：按批次分发到进程池，并按提交顺序流式产出 (文件路径, 命中关键词)"""
+    return run_batches(search_batch, file_paths, jobs, batch_size,
+                       initializer=init_worker, initargs=(matcher, {'reader': reader}))
+
+
+# 索引中文件的状态
+INDEX_TEXT = 0  # 已建立三元组索引的文本文件
+INDEX_BINARY = 1  # 二进制文件，搜索时直接跳过
+INDEX_OVERSIZE = 2  # 超过索引大小上限，搜索时总是作为候选文件
+# 超过该大小的文件不建立三元组索引，避免单个文件的三元组集合占用过多内存
+INDEX_MAX_FILE_SIZE = 64 * 1024 * 1024
+
+
+def extract_trigrams(file_path, chunk_size=CHUNK_SIZE):
+    """分块读取文件，返回 (状态, ASCII 小写化后的三元组整数集合)"""
+    trigrams = set()
+    with open(file_path, 'rb') as f:
+        chunk = f.read(chunk_size)
+        if is_binary_chunk(chunk):
+            return INDEX_BINARY, trigrams
+        tail = b''
+        while chunk:
+            # 拼接上一块末尾的 2 个字节，保证跨块的三元组不会丢失
+            data = tail + chunk.lower()
+            trigrams.update(data[i:i + 3] for i in range(len(data) - 2))
+            tail = data[-2:]
+            chunk = f.read(chunk_size)
+    return INDEX_TEXT, {int.from_bytes(tri, 'big') for tri in trigrams}
+
+
+def index_batch(entries):
+    """工作进程：为一批 (文件路径, 大小, 修改时间) 计算三元组，返回索引记录列表"""
+    results = []
+    for path, size, mtime_ns in entries:
+        if size > INDEX_MAX_FILE_SIZE:
+            results.append((path, size, mtime_ns, INDEX_OVERSIZE, set()))
+            continue
+        try:
+            status, trigrams = extract_trigrams(path)
+        except OSError:
+            continue
+        results.append((path, size, mtime_ns, status, trigrams))
+    return results
+
+
+class TrigramIndex:
+    """持久化的增量三元组倒排索引（SQLite 存储）
+
+    以 (路径, 大小, 修改时间) 判断文件是否变化，只重新索引变化的文件；
+    查询时先用关键词的三元组缩小候选文件范围，再交给匹配器逐个确认。
+    一个索引文件对应一棵目录树。
+    """
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self.conn = sqlite3.connect(db_path)
+        self.conn.executescript('''
+            CREATE TABLE IF NOT EXISTS files (
+                id INTEGER PRIMARY KEY,
+                path TEXT UNIQUE NOT NULL,
+                size INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                status INTEGER NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS postings (
+                trigram INTEGER NOT NULL,
+                file_id INTEGER NOT NULL,
+                PRIMARY KEY (trigram, file_id)
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS postings_file ON postings (file_id);
+        ''')
+
+    def close(self):
+        """关闭数据库连接"""
+        self.conn.close()
+
+    def _remove(self, file_id):
+        """删除一个文件的索引记录"""
+        self.conn.execute('DELETE FROM postings WHERE file_id = ?', (file_id,))
+        self.conn.execute('DELETE FROM files WHERE id = ?', (file_id,))
+
+    def update(self, root_dir, jobs=None, excludes=None):
+        """增量更新索引：只重新索引新增或变化的文件，并清除已删除的文件
+
+        返回 (新增或更新的文件数, 未变化的文件数, 删除的文件数)。
+        """
+        known = {path: (file_id, size, mtime_ns) for file_id, path, size, mtime_ns
+                 in self.conn.execute('SELECT id, path, size, mtime_ns FROM files')}
+        seen = set()
+        changed = []
+        for entry in walk_files(root_dir, None, excludes):
+            path = entry.path
+            try:
+                st = entry.stat()
+            except OSError:
+                continue
+            seen.add(path)
+            record = known.get(path)
+            if record and record[1] == st.st_size and record[2] == st.st_mtime_ns:
+                continue
+            changed.append((path, st.st_size, st.st_mtime_ns))
+
+        updated = 0
+        with self.conn:
+            for path, size, mtime_ns, status, trigrams in run_batches(index_batch, changed, jobs, 64):
+                if path in known:
+                    self._remove(known[path][0])
+                cursor = self.conn.execute(
+                    'INSERT INTO files (path, size, mtime_ns, status) VALUES (?, ?, ?, ?)',
+                    (path, size, mtime_ns, status))
+                self.conn.executemany(
+                    'INSERT INTO postings (trigram, file_id) VALUES (?, ?)',
+                    ((tri, cursor.lastrowid) for tri in trigrams))
+                updated += 1
+
+            removed = [record[0] for path, record in known.items() if path not in seen]
+            for file_id in removed:
+                self._remove(file_id)
+
+        return updated, len(seen) - len(changed), len(removed)
+
+    def _files_with_all(self, trigrams):
+        """返回同时包含全部三元组的文件 id 集合"""
+        result = None
+        # 交集一旦为空即可提前结束
+        for tri in trigrams:
+            ids = {row[0] for row in self.conn.execute(
+                'SELECT file_id FROM postings WHERE trigram = ?', (tri,))}
+            result = ids if result is None else result & ids
+            if not result:
+                break
+        return result or set()
+
+    def candidates(self, keywords, reader=None):
+        """返回可能包含任意关键词的 (文件路径, 文件大小) 列表（按路径排序）
+
+        任一关键词短于 3 个字节时无法用三元组过滤，返回全部非二进制文件。
+        reader（ArchiveReader）可进入的压缩包总是作为候选文件。
+        """
+        file_ids = set()
+        narrowed = True
+        for keyword in keywords:
+            for variant in {keyword, keyword.lower(), keyword.upper()}:
+                data = variant.encode('utf-8').lower()
+                if len(data) < 3:
+                    narrowed = False
+                    break
+                trigrams = {int.from_bytes(data[i:i + 3], 'big') for i in range(len(data) - 2)}
+                file_ids |= self._files_with_all(trigrams)
+            if not narrowed:
+                break
+
+        rows = self.conn.execute('SELECT id, path, size, status FROM files')
+        return sorted((path, size) for file_id, path, size, status in rows
+                      if (reader and reader.is_archive(os.path.basename(path)))
+                      or (status != INDEX_BINARY
+                          and (not narrowed or status == INDEX_OVERSIZE or file_id in file_ids)))
+
+
+def build_candidates(root_dir, keywords, extensions, jobs=None, index_path=None,
+                     exclude_rules=None, max_size=None, reader=None):
+    """生成待搜索的文件路径，返回 (候选路径迭代器, 索引统计)
+
+    指定 index_path 时先增量更新持久化索引，再用三元组缩小候选范围，
+    索引统计为 (重新索引数, 未变化数, 移除数, 候选数)；否则直接遍历目录，索引统计为 None。
+    """
+    if not index_path:
+        return iter_candidate_files(root_dir, extensions, exclude_rules, max_size, reader), None
+
+    index = TrigramIndex(index_path)
+    try:
+        updated, unchanged, removed = index.update(root_dir, jobs, exclude_rules)
+        indexed = index.candidates(keywords, reader)
+    finally:
+        index.close()
+    ext_set = normalize_extensions(extensions)
+    candidates = (path for path, size in indexed
+                  if (reader and reader.is_archive(os.path.basename(path)))
+                  or (matches_file_extension(os.path.basename(path), ext_set)
+                      and (max_size is None or size <= max_size)))
+    return candidates, (updated, unchanged, removed, len(indexed))
+
+
+def iter_search(root_dir, keywords, extensions=None, jobs=None, index_path=None,
+                excludes=None, max_size=None, max_count=None, files_with_matches=False,
+                limit=None, rules=None, archive_depth=0):
+    """可导入的流式搜索接口：边搜索边产出匹配结果字典（path、line、offset、keyword）
+
+    结果按遍历顺序确定性地产出；max_count 为单个文件的结果上限，
+    files_with_matches 为 True 时每个文件只产出第一处命中，
+    limit 为全局结果上限，达到后立即停止遍历与搜索。
+    指定 rules（RulePack）时改用规则包搜索，结果中以 rule、match 代替 keyword。
+    archive_depth 大于 0 时进入压缩包搜索（最多嵌套该层数），成员路径形如 a.jar!/b/c.xml。
+    """
+    if limit is not None and limit <= 0:
+        return
+    if rules is not None:
+        # 规则全部配置了字面量时，可用字面量通过索引缩小候选范围
+        index_keywords = rules.literals if rules.literals is not None else ['']
+        matcher, iter_matches, batch_func = rules, iter_rule_matches, search_rules_batch
+    else:
+        index_keywords = keywords
+        matcher = KeywordMatcher(keywords)
+        iter_matches, batch_func = iter_line_matches, search_lines_batch
+    reader = ArchiveReader(archive_depth, extensions, max_size)
+    candidates, _ = build_candidates(root_dir, index_keywords, extensions, jobs, index_path,
+                                     ExcludeRules(excludes), max_size, reader)
+    options = {'max_count': max_count, 'files_with_matches': files_with_matches,
+               'reader': reader}
+    if (jobs or os.cpu_count() or 1) == 1:
+        # 串行时逐个文件直接产出，达到 limit 后不会再打开后续文件
+        results = iter_files_matches(iter_matches, candidates, matcher, options)
+    else:
+        # 结果按批返回，批次取小一些，使首条结果尽早产出、达到 limit 时在途的文件更少
+        results = run_batches(batch_func, candidates, jobs, SEARCH_BATCH_SIZE,
+                              initializer=init_worker, initargs=(matcher, options))
+    count = 0
+    try:
+        for record in results:
+            yield record
+            count += 1
+            if limit is not None and count >= limit:
+                break
+    finally:
+        results.close()
+
+
+def search_files(root_dir, keywords, extensions, jobs=None, index_path=None,
+                 excludes=None, max_size=None, archive_depth=0):
+    """递归遍历目录，返回含关键词且匹配后缀的文件路径列表
+
+    excludes 为 gitignore 风格的排除规则列表，max_size 为文件大小上限（字节），
+    archive_depth 为进入压缩包的嵌套层数（0 表示不进入）。
+    """
     matched_files = []
 
     if not os.path.exists(root_dir):
@@ -83,24 +1055,129 @@ def search_files(root_dir, keywords, extensions):
         print(f"{Colors.GREEN}📄 文件后缀过滤: {', '.join(extensions)}{Colors.RESET}")
     else:
         print(f"{Colors.GREEN}📄 文件后缀过滤: 所有文件{Colors.RESET}")
-    print("\n请稍候，正在递归搜索文件...\n")
+    if excludes:
+        print(f"{Colors.GREEN}🚫 排除规则: {', '.join(excludes)}{Colors.RESET}")
+    if max_size is not None:
+        print(f"{Colors.GREEN}📏 文件大小上限: {max_size} 字节{Colors.RESET}")
+    if archive_depth:
+        print(f"{Colors.GREEN}📦 搜索压缩包: 最多 {archive_depth} 层嵌套{Colors.RESET}")
+    print(f"{Colors.GREEN}⚙️ 并行进程数: {jobs or os.cpu_count() or 1}{Colors.RESET}")
 
-    for dirpath, _, filenames in os.walk(root_dir):
-        for filename in filenames:
-            # 检查文件后缀是否匹配
-            if not matches_file_extension(filename, extensions):
-                continue
+    if index_path:
+        # 使用持久化索引：先增量更新，再通过三元组缩小候选文件范围
+        print(f"{Colors.GREEN}🗂️ 正在更新索引: {index_path}{Colors.RESET}")
+    reader = ArchiveReader(archive_depth, extensions, max_size)
+    candidates, index_stats = build_candidates(root_dir, keywords, extensions, jobs, index_path,
+                                               ExcludeRules(excludes), max_size, reader)
+    if index_stats:
+        updated, unchanged, removed, indexed = index_stats
+        print(f"{Colors.GREEN}   重新索引 {updated} 个文件，未变化 {unchanged} 个，"
+              f"移除 {removed} 个；候选文件 {indexed} 个{Colors.RESET}")
+
+    print("\n请稍候，正在递归搜索文件...\n")
 
-            file_path = os.path.join(dirpath, filename)
-            if search_keywords_in_file(file_path, keywords):
-                matched_files.append(file_path)
-                print(f"{Colors.CYAN}✅ 找到匹配文件: {file_path}{Colors.RESET}")
+    # 关键词匹配器每次运行只构建一次
+    matcher = KeywordMatcher(keywords)
+    for file_path, hits in parallel_search(candidates, matcher, jobs, reader=reader):
+        matched_files.append(file_path)
+        hit_list = ', '.join(kw for kw in matcher.keywords if kw in hits)
+        print(f"{Colors.CYAN}✅ 找到匹配文件: {file_path}（命中: {hit_list}）{Colors.RESET}")
 
     return matched_files
 
 
+def parse_size(text):
+    """解析带 K/M/G 单位的文件大小，返回字节数"""
+    units = {'K': 1024, 'M': 1024 ** 2, 'G': 1024 ** 3}
+    text = text.strip().upper().rstrip('B')
+    try:
+        if text and text[-1] in units:
+            return int(float(text[:-1]) * units[text[-1]])
+        return int(text)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"无效的文件大小: {text}")
+
+
+def parse_args():
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(description='文件关键词搜索工具')
+    parser.add_argument('-j', '--jobs', type=int, default=None,
+                        help='并行搜索的进程数（默认使用全部CPU核心，1表示串行）')
+    parser.add_argument('--index', default=None,
+                        help='持久化三元组索引文件路径（不存在则创建，每次搜索前增量更新）')
+    parser.add_argument('--exclude', action='append', default=[], metavar='PATTERN',
+                        help='gitignore 风格的排除规则，可多次指定（如 vendor/、*.min.js、/build）')
+    parser.add_argument('--no-default-excludes', action='store_true',
+                        help=f'不使用默认排除规则（{", ".join(DEFAULT_EXCLUDES)}）')
+    parser.add_argument('--max-size', type=parse_size, default=None,
+                        help='跳过超过该大小的文件，支持 K/M/G 单位（如 10M）')
+    parser.add_argument('--archive-depth', type=int, default=0,
+                        help='进入 zip/jar/war/tar.gz 等压缩包搜索的最大嵌套层数（默认 0，不进入）')
+    batch = parser.add_argument_group(
+        '非交互模式（指定 --path 及 --keywords 或 --rules 时启用，结果以 JSON Lines 输出）')
+    source = batch.add_mutually_exclusive_group()
+    source.add_argument('-k', '--keywords', help='要搜索的关键词，多个用英文逗号分隔')
+    source.add_argument('-r', '--rules', help='正则规则包文件（JSON 或 YAML），如 rules.json')
+    batch.add_argument('-p', '--path', help='要搜索的文件夹路径')
+    batch.add_argument('-e', '--ext', default='', help='文件后缀过滤，多个用英文逗号分隔')
+    batch.add_argument('-m', '--max-count', type=int, default=None,
+                       help='每个文件最多输出的匹配数')
+    batch.add_argument('-l', '--files-with-matches', action='store_true',
+                       help='每个文件只输出第一处匹配，命中后立即停止读取该文件')
+    batch.add_argument('--limit', type=int, default=None,
+                       help='全局结果上限，达到后立即停止搜索')
+    args = parser.parse_args()
+    if bool(args.keywords or args.rules) != bool(args.path):
+        parser.error('非交互模式需要同时指定 --path 和 --keywords（或 --rules）')
+    if not args.no_default_excludes:
+        args.exclude = DEFAULT_EXCLUDES + args.exclude
+    if args.archive_depth < 0:
+        parser.error('--archive-depth 不能为负数')
+    if args.jobs is not None and args.jobs < 1:
+        parser.error('--jobs 必须大于等于1')
+    return args
+
+
+def parse_extensions(text):
+    """解析逗号分隔的后缀列表，统一格式（确保带点号）"""
+    extensions = [ext.strip() for ext in text.split(',') if ext.strip()]
+    return [ext if ext.startswith('.') else f'.{ext}' for ext in extensions]
+
+
+def run_batch_mode(args):
+    """非交互模式：流式输出 JSON Lines 结果，返回进程退出码（有结果为 0，无结果为 1）"""
+    keywords = [kw.strip() for kw in (args.keywords or '').split(',') if kw.strip()]
+    root_dir = os.path.expanduser(args.path)
+    rules = None
+    if args.rules:
+        try:
+            rules = RulePack.load(args.rules)
+        except (OSError, ValueError, RuntimeError, re.error) as e:
+            print(f"错误: 无法加载规则包 '{args.rules}': {e}", file=sys.stderr)
+            return 2
+    elif not keywords:
+        print("错误: 关键词不能为空", file=sys.stderr)
+        return 2
+    if not os.path.isdir(root_dir):
+        print(f"错误: '{root_dir}' 不是有效目录", file=sys.stderr)
+        return 2
+
+    found = False
+    for record in iter_search(root_dir, keywords, parse_extensions(args.ext), args.jobs,
+                              args.index, args.exclude, args.max_size, args.max_count,
+                              args.files_with_matches, args.limit, rules, args.archive_depth):
+        sys.stdout.write(json.dumps(record, ensure_ascii=False) + '\n')
+        found = True
+    sys.stdout.flush()
+    return 0 if found else 1
+
+
 def main():
     """主函数：处理用户输入并执行搜索"""
+    args = parse_args()
+    if args.path:
+        sys.exit(run_batch_mode(args))
+
     os.system('cls' if os.name == 'nt' else 'clear')  # 清屏
     print_header("文件关键词搜索工具")
 
@@ -130,14 +1207,11 @@ def main():
     ).strip()
 
     # 处理文件后缀，统一格式（确保带点号）
-    extensions = []
-    if extensions_input:
-        extensions = [ext.strip() for ext in extensions_input.split(',') if ext.strip()]
-        # 确保每个后缀都以点号开头
-        extensions = [ext if ext.startswith('.') else f'.{ext}' for ext in extensions]
+    extensions = parse_extensions(extensions_input)
 
     # 执行搜索
-    matched_files = search_files(folder_path, keywords, extensions)
+    matched_files = search_files(folder_path, keywords, extensions, args.jobs, args.index,
+                                 args.exclude, args.max_size, args.archive_depth)
 
     # 展示最终结果 - 只显示文件名，并用绿色输出
     print_separator()
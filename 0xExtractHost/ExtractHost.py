@@ -1,69 +1,487 @@
+import argparse
+import csv
+import gzip
+import hashlib
+import json
 import os
-import pandas as pd
+import posixpath
+import shutil
+import sqlite3
+import tempfile
+import zipfile
+import xml.etree.ElementTree as ET
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from itertools import chain
 
+# xlsx 内部 XML 的命名空间
+MAIN_NS = '{http://schemas.openxmlformats.org/spreadsheetml/2006/main}'
+DOC_REL_NS = '{http://schemas.openxmlformats.org/officeDocument/2006/relationships}'
+PKG_REL_NS = '{http://schemas.openxmlformats.org/package/2006/relationships}'
 
-def extract_host_from_xlsx(file_path):
-    """从单个xlsx文件中提取Host列的内容"""
+# 默认缓存库（位于工作目录）
+DEFAULT_CACHE = '.extracthost_cache.db'
+HASH_CHUNK = 1 << 20
+
+# 默认按此优先级匹配列名（不区分大小写）
+DEFAULT_COLUMNS = ('host', 'domain', 'url')
+# 支持的导出格式，均可再加 .gz 压缩
+SUPPORTED_FORMATS = ('.xlsx', '.csv', '.tsv', '.jsonl')
+
+
+def _first_sheet_path(archive):
+    """按 workbook.xml 与其关系文件定位第一个工作表在压缩包中的路径"""
+    default = 'xl/worksheets/sheet1.xml'
     try:
-        # 读取Excel文件
-        df = pd.read_excel(file_path)
+        workbook = ET.fromstring(archive.read('xl/workbook.xml'))
+        rels = ET.fromstring(archive.read('xl/_rels/workbook.xml.rels'))
+    except KeyError:
+        return default
+    sheet = workbook.find(f'{MAIN_NS}sheets/{MAIN_NS}sheet')
+    if sheet is None:
+        return default
+    rel_id = sheet.get(f'{DOC_REL_NS}id')
+    for rel in rels.iter(f'{PKG_REL_NS}Relationship'):
+        if rel.get('Id') == rel_id:
+            target = rel.get('Target')
+            if target.startswith('/'):
+                return target.lstrip('/')
+            return posixpath.normpath(posixpath.join('xl', target))
+    return default
 
-        # 检查是否存在Host列
-        if 'Host' not in df.columns:
-            print(f"文件 {file_path} 中未找到Host列")
-            return []
 
-        # 提取Host列内容并去重
-        host_list = df['Host'].dropna().unique().tolist()
-        return host_list
+def _iter_shared_strings(archive):
+    """流式读取共享字符串表，按索引顺序逐个产出字符串"""
+    try:
+        source = archive.open('xl/sharedStrings.xml')
+    except KeyError:
+        return
+    with source:
+        root = None
+        for event, elem in ET.iterparse(source, events=('start', 'end')):
+            if root is None:
+                root = elem
+            if event == 'end' and elem.tag == f'{MAIN_NS}si':
+                # 富文本会拆成多个 <t>，拼接即为完整内容
+                yield ''.join(t.text or '' for t in elem.iter(f'{MAIN_NS}t'))
+                root.clear()
+
+
+def _column_letters(index):
+    """把从 0 开始的列序号转换为列字母（0 -> A，26 -> AA）"""
+    letters = ''
+    index += 1
+    while index:
+        index, rem = divmod(index - 1, 26)
+        letters = chr(ord('A') + rem) + letters
+    return letters
+
+
+def _column_index(letters):
+    """把列字母转换为从 0 开始的列序号"""
+    index = 0
+    for ch in letters:
+        index = index * 26 + ord(ch) - ord('A') + 1
+    return index - 1
+
+
+def _iter_cells(archive, sheet_path):
+    """流式遍历工作表单元格，产出 (行号, 列字母, 类型, 值)；处理完的行立即释放
+
+    单元格与行的 r 属性是可选的：缺失时按 <row> 的顺序与行内单元格的位置推算。
+    """
+    with archive.open(sheet_path) as source:
+        row_number = 0
+        column_index = 0
+        sheet_data = None
+        for event, elem in ET.iterparse(source, events=('start', 'end')):
+            if event == 'start':
+                if elem.tag == f'{MAIN_NS}sheetData':
+                    sheet_data = elem
+                elif elem.tag == f'{MAIN_NS}row':
+                    row = elem.get('r')
+                    row_number = int(row) if row and row.isdigit() else row_number + 1
+                    column_index = 0
+                continue
+            if elem.tag == f'{MAIN_NS}row':
+                # 连同父节点一并清空，已处理的行不会在内存中累积
+                sheet_data.clear()
+                continue
+            if elem.tag != f'{MAIN_NS}c':
+                continue
+            ref = elem.get('r', '')
+            column = ref.rstrip('0123456789')
+            if column:
+                column_index = _column_index(column)
+            else:
+                column = _column_letters(column_index)
+            column_index += 1
+            cell_type = elem.get('t', 'n')
+            if cell_type == 'inlineStr':
+                value = ''.join(t.text or '' for t in elem.iter(f'{MAIN_NS}t'))
+            else:
+                v = elem.find(f'{MAIN_NS}v')
+                value = v.text if v is not None else None
+            yield row_number, column, cell_type, value
+
+
+def _resolve_shared(archive, indexes):
+    """只从共享字符串表中取出需要的索引，返回 {索引: 字符串}"""
+    resolved = {}
+    if not indexes:
+        return resolved
+    last = max(indexes)
+    for i, text in enumerate(_iter_shared_strings(archive)):
+        if i in indexes:
+            resolved[i] = text
+        if i >= last:
+            break
+    return resolved
+
+
+def _match_column(headers, columns):
+    """按 columns 的优先级在表头中查找目标列（不区分大小写），返回其下标，未找到时抛出 KeyError"""
+    positions = {}
+    for i, header in enumerate(headers):
+        if header is not None:
+            positions.setdefault(header.strip().lower(), i)
+    for name in columns:
+        if name.lower() in positions:
+            return positions[name.lower()]
+    raise KeyError('/'.join(columns))
+
+
+def iter_xlsx_column(source, columns=DEFAULT_COLUMNS, name=None):
+    """流式读取 xlsx 第一个工作表中的目标列，逐行产出非空的单元格文本
+
+    source 为文件路径或可随机访问的文件对象，表头按 columns 的优先级匹配。只解析目标列：
+    表头行之后其它列的单元格在解析时即被丢弃，共享字符串表也只保留目标列用到的条目。
+    未找到目标列时抛出 KeyError；name 用于提示信息中的文件名。
+    """
+    with zipfile.ZipFile(source) as archive:
+        cells = _iter_cells(archive, _first_sheet_path(archive))
+
+        # 第一行视为表头
+        header = []
+        header_row = None
+        for row, column, cell_type, value in cells:
+            if header_row is None:
+                header_row = row
+            if row != header_row:
+                first_data = (row, column, cell_type, value)
+                break
+            header.append((column, cell_type, value))
+        else:
+            first_data = None
+
+        shared = _resolve_shared(archive, {int(v) for _, t, v in header if t == 's' and v is not None})
+        texts = [shared.get(int(value)) if cell_type == 's' and value is not None else value
+                 for _, cell_type, value in header]
+        target = header[_match_column(texts, columns)][0]
+        if first_data is None:
+            print(f"提示：文件 {name or source} 的第一个工作表只有表头，没有数据行")
+
+        # 目标列中的共享字符串先记下索引，读完工作表后再按需解析
+        values = []
+        pending = set()
+        data = cells if first_data is None else chain([first_data], cells)
+        for _, column, cell_type, value in data:
+            if column != target or value is None:
+                continue
+            if cell_type == 's':
+                index = int(value)
+                pending.add(index)
+                values.append(index)
+            else:
+                values.append(value)
+
+        shared = _resolve_shared(archive, pending)
+        for value in values:
+            text = shared.get(value) if isinstance(value, int) else value
+            if text is not None and text.strip():
+                yield text.strip()
+
+
+def iter_delimited_column(stream, columns=DEFAULT_COLUMNS, delimiter=','):
+    """流式读取 CSV/TSV 的目标列，逐行产出非空的单元格文本"""
+    reader = csv.reader(stream, delimiter=delimiter)
+    header = next(reader, None)
+    if header is None:
+        raise KeyError('/'.join(columns))
+    index = _match_column(header, columns)
+    for row in reader:
+        if len(row) > index and row[index].strip():
+            yield row[index].strip()
+
+
+def iter_jsonl_column(stream, columns=DEFAULT_COLUMNS):
+    """流式读取 JSONL 每条记录中的目标字段，逐行产出非空的文本；无法解析的行直接跳过"""
+    names = [name.lower() for name in columns]
+    for line in stream:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            continue
+        if not isinstance(record, dict):
+            continue
+        fields = {str(key).lower(): value for key, value in record.items()}
+        for name in names:
+            value = fields.get(name)
+            if value is not None and str(value).strip():
+                yield str(value).strip()
+                break
+
+
+def file_format(file_path):
+    """返回 (格式扩展名, 是否 gzip 压缩)，不支持的文件返回 (None, False)"""
+    name = file_path.lower()
+    compressed = name.endswith('.gz')
+    if compressed:
+        name = name[:-3]
+    for ext in SUPPORTED_FORMATS:
+        if name.endswith(ext):
+            return ext, compressed
+    return None, False
+
+
+def iter_file_column(file_path, columns=DEFAULT_COLUMNS):
+    """按扩展名选择读取方式，逐行产出目标列的文本"""
+    ext, compressed = file_format(file_path)
+    if ext == '.xlsx':
+        if not compressed:
+            yield from iter_xlsx_column(file_path, columns, file_path)
+            return
+        # zip 需要随机访问，先解压到临时文件（超过 64MB 才落盘）
+        with gzip.open(file_path, 'rb') as src, tempfile.SpooledTemporaryFile(64 << 20) as tmp:
+            shutil.copyfileobj(src, tmp)
+            tmp.seek(0)
+            yield from iter_xlsx_column(tmp, columns, file_path)
+        return
+
+    opener = gzip.open if compressed else open
+    with opener(file_path, 'rt', encoding='utf-8-sig', newline='') as stream:
+        if ext == '.jsonl':
+            yield from iter_jsonl_column(stream, columns)
+        else:
+            yield from iter_delimited_column(stream, columns, '\t' if ext == '.tsv' else ',')
+
+
+def normalize_host(value):
+    """规范化Host：小写，去除协议、用户信息、路径、端口与末尾点号；无法得到主机名时返回 None"""
+    host = value.strip().lower()
+    if '://' in host:
+        host = host.split('://', 1)[1]
+    for sep in '/?#':
+        host = host.split(sep, 1)[0]
+    host = host.rsplit('@', 1)[-1]
+    if host.startswith('['):
+        # [IPv6]:port
+        host = host[1:].split(']', 1)[0]
+    elif host.count(':') == 1:
+        name, _, port = host.partition(':')
+        if port.isdigit() or not port:
+            host = name
+    host = host.rstrip('.')
+    return host or None
 
-    except Exception as e:
-        print(f"处理文件 {file_path} 时出错: {str(e)}")
-        return []
 
+def extract_hosts(file_path, columns=DEFAULT_COLUMNS, normalize=False):
+    """从单个导出文件中提取目标列的Host，按首次出现顺序去重
 
-def save_hosts_to_file(hosts, filename="url.txt"):
-    """将host列表保存到文件中"""
+    默认保留单元格原文（仅去除首尾空白），normalize 为真时先用 normalize_host 规范化。
+    未找到目标列时返回空列表，出错时返回 None。
+    """
     try:
-        with open(filename, 'w', encoding='utf-8') as f:
-            for host in hosts:
-                f.write(f"{host}\n")
-        print(f"已成功将 {len(hosts)} 个唯一Host保存到 {filename}")
+        hosts = iter_file_column(file_path, columns)
+        if normalize:
+            hosts = (host for host in map(normalize_host, hosts) if host)
+        return list(dict.fromkeys(hosts))
+
+    except KeyError:
+        print(f"文件 {file_path} 中未找到 {'/'.join(columns)} 列")
+        return []
     except Exception as e:
-        print(f"保存文件时出错: {str(e)}")
+        print(f"处理文件 {file_path} 时出错: {str(e)}")
+        return None
 
 
-def main():
-    # 获取当前目录下所有的xlsx文件
-    current_dir = os.getcwd()
-    xlsx_files = [f for f in os.listdir(current_dir)
-                  if f.endswith('.xlsx') and os.path.isfile(os.path.join(current_dir, f))]
+def discover_files(paths, recursive=True):
+    """在给定路径中查找支持的导出文件（目录默认递归查找，跳过隐藏目录），按路径排序返回"""
+    found = []
+    for path in paths:
+        if os.path.isfile(path):
+            found.append(path)
+            continue
+        for root, dirs, files in os.walk(path):
+            dirs[:] = sorted(d for d in dirs if not d.startswith('.'))
+            found.extend(os.path.join(root, f) for f in sorted(files) if file_format(f)[0])
+            if not recursive:
+                break
+    return found
 
-    if not xlsx_files:
-        print("当前目录下没有找到xlsx文件")
-        return
 
-    # 存储所有提取到的Host
-    all_hosts = []
+def file_digest(file_path):
+    """分块计算文件内容的 blake2b 摘要"""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ResultCache:
+    """提取结果缓存（SQLite）：按内容摘要（及提取参数）保存每个文件提取到的 Host
+
+    files 表记录路径对应的大小、修改时间与摘要；大小和修改时间都未变时直接命中，
+    否则重新计算摘要，摘要相同（如仅被复制或 touch）也无需重新解析。
+    """
+
+    def __init__(self, db_path):
+        self.conn = sqlite3.connect(db_path)
+        self.conn.executescript('''
+            CREATE TABLE IF NOT EXISTS files (
+                path TEXT PRIMARY KEY,
+                size INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                digest TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS result_cache (
+                key TEXT PRIMARY KEY,
+                hosts TEXT NOT NULL
+            );
+        ''')
+
+    def close(self):
+        """关闭数据库连接"""
+        self.conn.close()
+
+    def lookup_stat(self, path, size, mtime_ns):
+        """大小与修改时间均未变化时返回缓存的摘要，否则返回 None"""
+        row = self.conn.execute('SELECT size, mtime_ns, digest FROM files WHERE path = ?', (path,)).fetchone()
+        if row is not None and row[0] == size and row[1] == mtime_ns:
+            return row[2]
+        return None
 
-    # 处理每个xlsx文件
-    for file in xlsx_files:
-        file_path = os.path.join(current_dir, file)
-        print(f"正在处理文件: {file}")
+    def get_hosts(self, result_key):
+        """按 "摘要:参数" 键取出缓存的提取结果，未命中时返回 None"""
+        row = self.conn.execute('SELECT hosts FROM result_cache WHERE key = ?', (result_key,)).fetchone()
+        return None if row is None else json.loads(row[0])
 
-        hosts = extract_host_from_xlsx(file_path)
-        all_hosts.extend(hosts)
+    def store(self, path, size, mtime_ns, digest, result_key, hosts=None):
+        """记录文件状态；hosts 不为 None 时同时以 result_key 保存提取结果"""
+        with self.conn:
+            self.conn.execute('INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?)', (path, size, mtime_ns, digest))
+            if hosts is not None:
+                self.conn.execute('INSERT OR REPLACE INTO result_cache VALUES (?, ?)',
+                                  (result_key, json.dumps(hosts, ensure_ascii=False)))
 
-        if hosts:
-            print(f"从 {file} 中提取到 {len(hosts)} 个Host")
-        print("---")
 
-    # 去重并显示所有结果
-    unique_hosts = list(set(all_hosts))
-    print(f"所有文件中总共提取到 {len(unique_hosts)} 个唯一的Host")
+def extract_all(file_paths, jobs=None, cache=None, columns=DEFAULT_COLUMNS, normalize=False):
+    """并行提取多个导出文件，按 file_paths 的顺序逐个产出 (Host列表或 None, 是否来自缓存)
+
+    启用缓存时先按大小/修改时间、再按内容摘要命中，只有内容变化的文件才会被重新解析。
+    缓存结果同时以列名与规范化设置区分，改变参数后不会误用旧结果。
+    """
+    extract = partial(extract_hosts, columns=tuple(columns), normalize=normalize)
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        if cache is None:
+            for hosts in executor.map(extract, file_paths):
+                yield hosts, False
+            return
+
+        profile = json.dumps([list(columns), normalize])
+        stats = [os.stat(path) for path in file_paths]
+        keys = [os.path.abspath(path) for path in file_paths]
+        digests = [cache.lookup_stat(key, st.st_size, st.st_mtime_ns) for key, st in zip(keys, stats)]
+
+        # 大小或修改时间变化的文件重新计算摘要
+        stale = [i for i, digest in enumerate(digests) if digest is None]
+        for i, digest in zip(stale, executor.map(file_digest, [file_paths[i] for i in stale])):
+            digests[i] = digest
+
+        cached = [cache.get_hosts(f"{digest}:{profile}") for digest in digests]
+        missing = [i for i, hosts in enumerate(cached) if hosts is None]
+        parsed = executor.map(extract, [file_paths[i] for i in missing])
+
+        # 按原顺序产出：命中缓存的直接产出，其余依次取并行解析的结果
+        for i, hosts in enumerate(cached):
+            from_cache = hosts is not None
+            if not from_cache:
+                hosts = next(parsed)
+            # 解析出错的文件不写入缓存，下次重试
+            if hosts is not None:
+                cache.store(keys[i], stats[i].st_size, stats[i].st_mtime_ns, digests[i],
+                            f"{digests[i]}:{profile}", None if from_cache else hosts)
+            yield hosts, from_cache
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='从 xlsx/CSV/TSV/JSONL 导出文件（可为 .gz 压缩）中提取Host列，按首次出现顺序去重')
+    parser.add_argument('paths', nargs='*', default=['.'],
+                        help='要处理的文件或目录，目录会递归查找（默认当前目录）')
+    parser.add_argument('-o', '--output', default='url.txt', help='结果文件路径（默认 url.txt）')
+    parser.add_argument('-c', '--columns', default=','.join(DEFAULT_COLUMNS),
+                        help=f'候选列名，逗号分隔，按顺序优先匹配且不区分大小写（默认 {",".join(DEFAULT_COLUMNS)}）')
+    parser.add_argument('--normalize', action='store_true',
+                        help='规范化Host：转小写并去除协议、路径、端口，只保留主机名（默认保留原文）')
+    parser.add_argument('--no-recursive', action='store_true', help='目录只查找顶层文件')
+    parser.add_argument('-j', '--jobs', type=int, default=None,
+                        help='并行解析的进程数（默认使用全部CPU核心）')
+    parser.add_argument('--cache', default=DEFAULT_CACHE,
+                        help=f'结果缓存库路径，未变化的文件直接复用上次结果（默认 {DEFAULT_CACHE}）')
+    parser.add_argument('--no-cache', action='store_true', help='不使用缓存，全部重新解析')
+    args = parser.parse_args()
+    if args.jobs is not None and args.jobs < 1:
+        parser.error('--jobs 必须大于等于1')
+    columns = [name.strip() for name in args.columns.split(',') if name.strip()]
+    if not columns:
+        parser.error('--columns 不能为空')
+
+    # 查找所有支持的导出文件（排除结果文件本身）
+    output = os.path.abspath(args.output)
+    files = [f for f in discover_files(args.paths, recursive=not args.no_recursive)
+             if os.path.abspath(f) != output]
+
+    if not files:
+        print("没有找到 xlsx/csv/tsv/jsonl 文件")
+        return
+
+    print(f"正在处理 {len(files)} 个文件...")
+    cache = None if args.no_cache else ResultCache(args.cache)
+    seen = set()
+    cached = 0
+    try:
+        # 按文件顺序流式去重写出，结果顺序在多次运行间保持稳定
+        with open(args.output, 'w', encoding='utf-8') as out:
+            results = extract_all(files, args.jobs, cache, columns, args.normalize)
+            for file, (hosts, from_cache) in zip(files, results):
+                if not hosts:
+                    continue
+                cached += from_cache
+                new = 0
+                for host in hosts:
+                    if host not in seen:
+                        seen.add(host)
+                        out.write(f"{host}\n")
+                        new += 1
+                print(f"从 {file} 中提取到 {len(hosts)} 个Host（新增 {new} 个）"
+                      f"{'（缓存）' if from_cache else ''}")
+    except Exception as e:
+        print(f"保存文件时出错: {str(e)}")
+        return
+    finally:
+        if cache is not None:
+            cache.close()
 
-    # 保存到文件
-    save_hosts_to_file(unique_hosts)
+    if cached:
+        print(f"其中 {cached} 个文件未变化，直接使用缓存结果")
+    print("---")
+    print(f"所有文件中总共提取到 {len(seen)} 个唯一的Host")
+    print(f"已成功将 {len(seen)} 个唯一Host保存到 {args.output}")
 
 
 if __name__ == "__main__":
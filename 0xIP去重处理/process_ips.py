@@ -1,40 +1,653 @@
-def process_ip_addresses(input_file, output_file):
-    # 存储处理后的IP地址，使用集合自动去重
-    unique_ips = set()
+import argparse
+import heapq
+import ipaddress
+import os
+import shutil
+import struct
+import sys
+import tempfile
+from array import array
+from bisect import bisect_right
+from concurrent.futures import ProcessPoolExecutor
 
+try:
+    import numpy as np
+except ImportError:  # 没有 NumPy 时退化为按首字节分桶的纯 Python 排序
+    np = None
+
+# 从分片文件读取整数时每批的数量
+READ_BATCH = 1 << 16
+
+ADDRESS_BITS = {4: 32, 6: 128}
+MASK64 = (1 << 64) - 1
+# 默认展开上限：一个 /8 的地址数，更大的区间直接写为CIDR块
+DEFAULT_MAX_EXPAND = 1 << 24
+
+
+def parse_ipv4(text):
+    """把点分十进制IPv4地址解析为32位整数，格式不合法时返回 None"""
+    parts = text.split('.')
+    if len(parts) != 4:
+        return None
+    value = 0
+    for part in parts:
+        if not part.isdigit() or not part.isascii() or len(part) > 3:
+            return None
+        octet = int(part)
+        if octet > 255:
+            return None
+        value = (value << 8) | octet
+    return value
+
+
+def format_ipv4(value):
+    """把32位整数还原为点分十进制字符串"""
+    return f"{value >> 24}.{(value >> 16) & 255}.{(value >> 8) & 255}.{value & 255}"
+
+
+def parse_ipv6(text):
+    """把IPv6地址解析为128位整数，格式不合法时返回 None"""
     try:
-        # 读取输入文件
-        with open(input_file, 'r', encoding='utf-8') as f:
-            for line in f:
-                # 去除每行首尾的空白字符
-                ip = line.strip()
-
-                # 跳过空行
-                if not ip:
+        return int(ipaddress.IPv6Address(text))
+    except ValueError:
+        return None
+
+
+def parse_address(text):
+    """解析单个地址，返回 (版本, 整数值)，格式不合法时返回 None"""
+    if ':' in text:
+        value = parse_ipv6(text)
+        return None if value is None else (6, value)
+    value = parse_ipv4(text)
+    return None if value is None else (4, value)
+
+
+def parse_entry(text):
+    """解析一行输入：单个地址、CIDR（1.2.3.0/24）或区间（1.2.3.4-1.2.3.99）
+
+    返回 (版本, 起始值, 结束值) 闭区间，格式不合法时返回 None。CIDR 中的主机位会被清零。
+    """
+    if '-' in text:
+        first, _, last = text.partition('-')
+        start, end = parse_address(first.strip()), parse_address(last.strip())
+        if start is None or end is None or start[0] != end[0] or start[1] > end[1]:
+            return None
+        return start[0], start[1], end[1]
+
+    if '/' in text:
+        address, _, prefix = text.partition('/')
+        parsed = parse_address(address)
+        if parsed is None or not prefix.isdigit() or not prefix.isascii():
+            return None
+        version, value = parsed
+        bits = ADDRESS_BITS[version]
+        prefix = int(prefix)
+        if prefix > bits:
+            return None
+        host_mask = (1 << (bits - prefix)) - 1
+        start = value & ~host_mask
+        return version, start, start | host_mask
+
+    parsed = parse_address(text)
+    if parsed is None:
+        return None
+    return parsed[0], parsed[1], parsed[1]
+
+
+class IntervalStore:
+    """以紧凑整数数组存储地址区间：IPv4 为两个 array('I')，IPv6 拆为高低两个64位存入 array('Q')"""
+
+    def __init__(self, version):
+        self.version = version
+        if version == 4:
+            self.starts, self.ends = array('I'), array('I')
+        else:
+            # 每个区间依次存放 起始高64位、起始低64位、结束高64位、结束低64位
+            self.words = array('Q')
+
+    def add(self, start, end):
+        if self.version == 4:
+            self.starts.append(start)
+            self.ends.append(end)
+        else:
+            self.words.extend((start >> 64, start & MASK64, end >> 64, end & MASK64))
+
+    def __len__(self):
+        return len(self.starts) if self.version == 4 else len(self.words) // 4
+
+    def __iter__(self):
+        if self.version == 4:
+            yield from zip(self.starts, self.ends)
+            return
+        words = self.words
+        for i in range(0, len(words), 4):
+            yield (words[i] << 64) | words[i + 1], (words[i + 2] << 64) | words[i + 3]
+
+
+def read_entries(input_file, single_ipv4, ipv4_only=False, ranges4=None, ranges6=None):
+    """读取输入文件并按类型分流
+
+    IPv4 单地址追加到 single_ipv4（array('I') 或分片写入器），IPv4 的 CIDR/区间
+    与全部 IPv6 条目交给 ranges4/ranges6（默认新建 IntervalStore，也可为分片写入器），不做展开。
+    返回 (IPv4区间, IPv6区间, 跳过的IPv6行数, 无效行数)。
+    """
+    if ranges4 is None:
+        ranges4 = IntervalStore(4)
+    if ranges6 is None:
+        ranges6 = IntervalStore(6)
+    skipped = invalid = 0
+    with open(input_file, 'r', encoding='utf-8') as f:
+        for line in f:
+            # 去除每行首尾的空白字符，跳过空行
+            text = line.strip()
+            if not text:
+                continue
+            if ipv4_only and ':' in text:
+                skipped += 1
+                continue
+            # 单个IPv4地址走快速路径
+            value = parse_ipv4(text)
+            if value is not None:
+                single_ipv4.append(value)
+                continue
+            entry = parse_entry(text)
+            if entry is None:
+                invalid += 1
+                continue
+            version, start, end = entry
+            (ranges4 if version == 4 else ranges6).add(start, end)
+    return ranges4, ranges6, skipped, invalid
+
+
+def unique_sorted(addresses):
+    """对地址数组去重并按数值升序排列，返回新的 array('I')
+
+    有 NumPy 时使用向量化的 np.unique；否则按首字节分为 256 个桶逐桶排序，
+    临时列表只占单个桶的大小。
+    """
+    if np is not None:
+        values = np.frombuffer(addresses, dtype=np.uint32) if addresses else np.empty(0, dtype=np.uint32)
+        return array('I', np.unique(values).tobytes())
+
+    buckets = [array('I') for _ in range(256)]
+    for value in addresses:
+        buckets[value >> 24].append(value)
+    result = array('I')
+    for bucket in buckets:
+        previous = None
+        for value in sorted(bucket):
+            if value != previous:
+                result.append(value)
+                previous = value
+    return result
+
+
+def merge_intervals(intervals):
+    """合并按起始值升序排列的区间序列，重叠或相邻的区间合为一个，逐个产出 (起始值, 结束值)"""
+    current_start = current_end = None
+    for start, end in intervals:
+        if current_end is not None and start <= current_end + 1:
+            if end > current_end:
+                current_end = end
+            continue
+        if current_start is not None:
+            yield current_start, current_end
+        current_start, current_end = start, end
+    if current_start is not None:
+        yield current_start, current_end
+
+
+def split_cidrs(start, end, bits):
+    """把闭区间 [start, end] 拆分为对齐的最大CIDR块，逐个产出 (起始值, 前缀长度)"""
+    while start <= end:
+        size = (start & -start) if start else 1 << bits
+        while size > end - start + 1:
+            size >>= 1
+        yield start, bits + 1 - size.bit_length()
+        start += size
+
+
+def merged_ipv4(singles, ranges4):
+    """把有序无重复的单地址序列与 IPv4 区间合并为有序且互不重叠的区间序列"""
+    points = ((value, value) for value in singles)
+    return merge_intervals(heapq.merge(points, sorted(ranges4)))
+
+
+def format_address(version, value):
+    return format_ipv4(value) if version == 4 else str(ipaddress.IPv6Address(value))
+
+
+def write_intervals(sources, output_file, cidr=False, max_expand=DEFAULT_MAX_EXPAND):
+    """按版本依次写出合并后的区间：逐个地址惰性展开，或写为CIDR块
+
+    sources 为 [(版本, 区间序列)]。超过 max_expand 个地址的区间不展开，直接写为CIDR块。
+    返回 (覆盖的地址数, 写出的行数, 未展开的区间数)。
+    """
+    addresses = written = oversized = 0
+    with open(output_file, 'w', encoding='utf-8') as f:
+        for version, intervals in sources:
+            bits = ADDRESS_BITS[version]
+            for start, end in intervals:
+                size = end - start + 1
+                addresses += size
+                if cidr or size > max_expand:
+                    oversized += not cidr
+                    for block, prefix in split_cidrs(start, end, bits):
+                        f.write(f"{format_address(version, block)}/{prefix}\n")
+                        written += 1
                     continue
+                for value in range(start, end + 1):
+                    f.write(format_address(version, value) + '\n')
+                written += size
+    return addresses, written, oversized
+
+
+class _Words128:
+    """把 IntervalStore 中按高低64位存放的 IPv6 起始或结束值暴露为只读整数序列，供 bisect 使用"""
+
+    def __init__(self, words, offset):
+        self.words = words
+        self.offset = offset
+
+    def __len__(self):
+        return len(self.words) // 4
+
+    def __getitem__(self, i):
+        i = i * 4 + self.offset
+        return (self.words[i] << 64) | self.words[i + 1]
+
+
+class MembershipIndex:
+    """IP/CIDR 成员索引：按版本存储有序且互不重叠的整数区间，查询为一次二分查找
+
+    可保存为二进制文件（小端序），供多次运行复用。
+    """
+
+    MAGIC = b'IPIDX1\n'
+
+    def __init__(self, intervals4=(), intervals6=()):
+        """intervals4/intervals6 须为按起始值升序、互不重叠的区间序列（如 merge_intervals 的结果）"""
+        self.stores = {4: IntervalStore(4), 6: IntervalStore(6)}
+        for version, intervals in ((4, intervals4), (6, intervals6)):
+            for start, end in intervals:
+                self.stores[version].add(start, end)
+        self._bounds = {
+            4: (self.stores[4].starts, self.stores[4].ends),
+            6: (_Words128(self.stores[6].words, 0), _Words128(self.stores[6].words, 2)),
+        }
+
+    @classmethod
+    def from_files(cls, paths):
+        """从若干地址列表（文本）或已保存的索引文件构建合并后的索引"""
+        sources4, sources6 = [], []
+        for path in paths:
+            with open(path, 'rb') as f:
+                saved = f.read(len(cls.MAGIC)) == cls.MAGIC
+            if saved:
+                index = cls.load(path)
+                sources4.append(iter(index.stores[4]))
+                sources6.append(iter(index.stores[6]))
+                continue
+            singles = array('I')
+            ranges4, ranges6, _, invalid = read_entries(path, singles)
+            if invalid:
+                print(f"提示：范围文件 {path} 中有{invalid}个无效条目已跳过")
+            sources4.append(merged_ipv4(unique_sorted(singles), ranges4))
+            sources6.append(merge_intervals(sorted(ranges6)))
+        return cls(merge_intervals(heapq.merge(*sources4)), merge_intervals(heapq.merge(*sources6)))
+
+    def __len__(self):
+        return len(self.stores[4]) + len(self.stores[6])
+
+    def _first_overlap(self, version, start):
+        """返回第一个结束值不小于 start 的区间下标"""
+        starts, ends = self._bounds[version]
+        i = bisect_right(starts, start) - 1
+        if i < 0 or ends[i] < start:
+            i += 1
+        return i
+
+    def contains(self, version, value):
+        """判断单个地址是否落在索引内"""
+        starts, ends = self._bounds[version]
+        i = bisect_right(starts, value) - 1
+        return i >= 0 and ends[i] >= value
+
+    def intersect(self, version, start, end):
+        """产出区间 [start, end] 落在索引内的部分"""
+        starts, ends = self._bounds[version]
+        i = self._first_overlap(version, start)
+        while i < len(starts) and starts[i] <= end:
+            yield max(starts[i], start), min(ends[i], end)
+            i += 1
+
+    def subtract(self, version, start, end):
+        """产出区间 [start, end] 不在索引内的部分"""
+        starts, ends = self._bounds[version]
+        i = self._first_overlap(version, start)
+        while i < len(starts) and starts[i] <= end and start <= end:
+            if starts[i] > start:
+                yield start, starts[i] - 1
+            start = ends[i] + 1
+            i += 1
+        if start <= end:
+            yield start, end
+
+    def save(self, path):
+        """保存为二进制索引文件"""
+        arrays = [self.stores[4].starts, self.stores[4].ends, self.stores[6].words]
+        with open(path, 'wb') as f:
+            f.write(self.MAGIC)
+            f.write(struct.pack('<QQ', len(self.stores[4]), len(self.stores[6])))
+            for values in arrays:
+                if sys.byteorder == 'big':
+                    values = array(values.typecode, values)
+                    values.byteswap()
+                values.tofile(f)
+
+    @classmethod
+    def load(cls, path):
+        """加载 save 保存的二进制索引文件"""
+        index = cls()
+        with open(path, 'rb') as f:
+            header = f.read(len(cls.MAGIC) + 16)
+            if len(header) != len(cls.MAGIC) + 16 or not header.startswith(cls.MAGIC):
+                raise ValueError(f"{path} 不是有效的索引文件")
+            count4, count6 = struct.unpack('<QQ', header[len(cls.MAGIC):])
+            # 数据长度须与头部记录的区间数完全一致，截断或多余的内容都视为损坏
+            if os.fstat(f.fileno()).st_size != len(header) + count4 * 8 + count6 * 32:
+                raise ValueError(f"{path} 不是有效的索引文件（长度与区间数不符）")
+            store4, store6 = index.stores[4], index.stores[6]
+            for values, count in ((store4.starts, count4), (store4.ends, count4), (store6.words, count6 * 4)):
+                values.fromfile(f, count)
+                if sys.byteorder == 'big':
+                    values.byteswap()
+        return index
+
 
-                # 剔除包含冒号的IPv6地址
-                if ':' not in ip:
-                    unique_ips.add(ip)
+def filter_intervals(version, intervals, include=None, exclude=None):
+    """在一次流式遍历中按包含范围取交集、按排除范围取差集，输出仍有序且互不重叠"""
+    for start, end in intervals:
+        pieces = [(start, end)]
+        if include is not None:
+            pieces = [piece for s, e in pieces for piece in include.intersect(version, s, e)]
+        if exclude is not None:
+            pieces = [piece for s, e in pieces for piece in exclude.subtract(version, s, e)]
+        yield from pieces
 
-        # 将处理后的IP写入输出文件
-        with open(output_file, 'w', encoding='utf-8') as f:
-            # 按顺序写入（虽然集合是无序的，但这里只是为了保持一致性）
-            for ip in sorted(unique_ips):
-                f.write(ip + '\n')
 
-        print(f"处理完成！共处理{len(unique_ips)}个唯一的IPv4地址，已保存到{output_file}")
+def build_sources(intervals4, intervals6, include=None, exclude=None):
+    """按范围索引过滤两个版本合并后的区间序列，返回 write_intervals 所需的 [(版本, 区间序列)]"""
+    sources = [(4, intervals4), (6, intervals6)]
+    if include is None and exclude is None:
+        return sources
+    return [(version, filter_intervals(version, intervals, include, exclude))
+            for version, intervals in sources]
 
+
+def build_index(input_file, output_file):
+    """把地址列表构建为二进制成员索引并保存"""
+    try:
+        index = MembershipIndex.from_files([input_file])
+        index.save(output_file)
+        print(f"索引构建完成！共{len(index.stores[4])}个IPv4区间、{len(index.stores[6])}个IPv6区间，"
+              f"已保存到{output_file}")
     except FileNotFoundError:
         print(f"错误：找不到文件 {input_file}")
     except Exception as e:
         print(f"处理过程中发生错误：{str(e)}")
 
 
+def report(addresses, written, output_file, skipped, invalid, cidr, oversized):
+    print(f"处理完成！共处理{addresses}个唯一的IP地址，已保存到{output_file}")
+    if cidr:
+        print(f"已合并为{written}个CIDR块")
+    if oversized:
+        print(f"有{oversized}个区间超过展开上限，已直接写为CIDR块")
+    if skipped:
+        print(f"已剔除IPv6条目{skipped}个")
+    if invalid:
+        print(f"已跳过无效条目{invalid}个")
+
+
+def process_ip_addresses(input_file, output_file, cidr=False, ipv4_only=False,
+                         max_expand=DEFAULT_MAX_EXPAND, include=None, exclude=None):
+    try:
+        # 单个IPv4地址以32位整数存储，CIDR/区间与IPv6以区间形式存储，输出时再惰性展开
+        singles = array('I')
+        ranges4, ranges6, skipped, invalid = read_entries(input_file, singles, ipv4_only)
+        singles = unique_sorted(singles)
+
+        sources = build_sources(merged_ipv4(singles, ranges4), merge_intervals(sorted(ranges6)),
+                                include, exclude)
+        addresses, written, oversized = write_intervals(sources, output_file, cidr, max_expand)
+        report(addresses, written, output_file, skipped, invalid, cidr, oversized)
+
+    except FileNotFoundError:
+        print(f"错误：找不到文件 {input_file}")
+    except Exception as e:
+        print(f"处理过程中发生错误：{str(e)}")
+
+
+class ShardWriter:
+    """按哈希把IPv4单地址以二进制整数分散写入各分片文件（同一地址总落在同一分片）"""
+
+    def __init__(self, shard_paths):
+        self.files = [open(path, 'wb') for path in shard_paths]
+        self.buffers = [array('I') for _ in shard_paths]
+
+    def append(self, value):
+        # 乘法散列打散相邻地址，避免集中在同一网段的输入挤进少数分片
+        shard = ((value * 2654435761) & 0xFFFFFFFF) % len(self.files)
+        buffer = self.buffers[shard]
+        buffer.append(value)
+        if len(buffer) >= READ_BATCH:
+            buffer.tofile(self.files[shard])
+            del buffer[:]
+
+    def close(self):
+        for buffer, file in zip(self.buffers, self.files):
+            buffer.tofile(file)
+            file.close()
+
+
+def dedup_shard(shard_path):
+    """工作进程：对单个分片去重并按数值排序后原地写回，返回去重后的数量"""
+    addresses = array('I')
+    with open(shard_path, 'rb') as f:
+        addresses.frombytes(f.read())
+    unique = unique_sorted(addresses)
+    with open(shard_path, 'wb') as f:
+        unique.tofile(f)
+    return len(unique)
+
+
+def iter_shard(path):
+    """分批读取分片文件中的整数"""
+    with open(path, 'rb') as f:
+        while True:
+            chunk = f.read(READ_BATCH * 4)
+            if not chunk:
+                break
+            values = array('I')
+            values.frombytes(chunk)
+            yield from values
+
+
+class RecordShardWriter:
+    """按哈希把定长二进制记录分散追加到各分片文件（同一记录总落在同一分片）
+
+    缓冲区写满时才打开对应分片追加写入，同时打开的文件始终只有一个；没有记录的分片不会创建文件。
+    """
+
+    def __init__(self, shard_paths, width):
+        self.paths = shard_paths
+        self.width = width
+        self.buffers = [bytearray() for _ in shard_paths]
+
+    def append(self, record):
+        shard = hash(record) % len(self.paths)
+        buffer = self.buffers[shard]
+        buffer += record
+        if len(buffer) >= READ_BATCH * self.width:
+            self._flush(shard)
+
+    def _flush(self, shard):
+        with open(self.paths[shard], 'ab') as f:
+            f.write(self.buffers[shard])
+        self.buffers[shard].clear()
+
+    def close(self):
+        for shard, buffer in enumerate(self.buffers):
+            if buffer:
+                self._flush(shard)
+
+    def shards(self):
+        """返回已写入的 (分片路径, 记录长度) 列表"""
+        return [(path, self.width) for path in self.paths if os.path.exists(path)]
+
+
+class IntervalShardWriter:
+    """把一个版本的地址区间写入磁盘分片，代替分片模式中的 IntervalStore
+
+    值以大端序定长字节存储，字节序即数值序：单地址为一条 4/16 字节记录，
+    CIDR/区间为起止值拼成的 8/32 字节记录。
+    """
+
+    def __init__(self, work_dir, version, shards):
+        self.size = ADDRESS_BITS[version] // 8
+        self.singles = RecordShardWriter(
+            [os.path.join(work_dir, f"v{version}_single_{i}.bin") for i in range(shards)], self.size)
+        self.ranges = RecordShardWriter(
+            [os.path.join(work_dir, f"v{version}_range_{i}.bin") for i in range(shards)], self.size * 2)
+
+    def add(self, start, end):
+        if start == end:
+            self.singles.append(start.to_bytes(self.size, 'big'))
+        else:
+            self.ranges.append(start.to_bytes(self.size, 'big') + end.to_bytes(self.size, 'big'))
+
+    def close(self):
+        self.singles.close()
+        self.ranges.close()
+
+    def shards(self):
+        return self.singles.shards() + self.ranges.shards()
+
+    def intervals(self):
+        """各分片经 dedup_record_shard 排序后，多路归并产出按起始值升序的 (起始值, 结束值)"""
+        size = self.size
+        singles = heapq.merge(*(iter_records(path, width) for path, width in self.singles.shards()))
+        ranges = heapq.merge(*(iter_records(path, width) for path, width in self.ranges.shards()))
+        points = ((value, value) for value in (int.from_bytes(r, 'big') for r in singles))
+        pairs = ((int.from_bytes(r[:size], 'big'), int.from_bytes(r[size:], 'big')) for r in ranges)
+        return heapq.merge(points, pairs)
+
+
+def dedup_record_shard(task):
+    """工作进程：对单个定长记录分片去重并按字节序排序后原地写回，返回去重后的数量"""
+    path, width = task
+    with open(path, 'rb') as f:
+        data = f.read()
+    unique = sorted({data[i:i + width] for i in range(0, len(data), width)})
+    with open(path, 'wb') as f:
+        f.write(b''.join(unique))
+    return len(unique)
+
+
+def iter_records(path, width):
+    """分批读取分片文件中的定长记录"""
+    with open(path, 'rb') as f:
+        while True:
+            chunk = f.read(READ_BATCH * width)
+            if not chunk:
+                break
+            for i in range(0, len(chunk), width):
+                yield chunk[i:i + width]
+
+
+def process_ip_addresses_sharded(input_file, output_file, shards=64, jobs=None, tmp_dir=None,
+                                 cidr=False, ipv4_only=False, max_expand=DEFAULT_MAX_EXPAND,
+                                 include=None, exclude=None):
+    """分片模式：全部条目哈希分片落盘后多进程并行去重，再多路归并写出，内存占用约为单个分片的大小
+
+    IPv4 单地址以 32 位整数分片；IPv4 的 CIDR/区间与全部 IPv6 条目以定长记录分片（见 IntervalShardWriter）。
+    """
+    work_dir = tempfile.mkdtemp(prefix='ips_', dir=tmp_dir)
+    try:
+        shard_paths = [os.path.join(work_dir, f"shard_{i}.bin") for i in range(shards)]
+        writer = ShardWriter(shard_paths)
+        ranges4 = IntervalShardWriter(work_dir, 4, shards)
+        ranges6 = IntervalShardWriter(work_dir, 6, shards)
+        try:
+            _, _, skipped, invalid = read_entries(input_file, writer, ipv4_only, ranges4, ranges6)
+        finally:
+            writer.close()
+            ranges4.close()
+            ranges6.close()
+
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            list(executor.map(dedup_shard, shard_paths))
+            list(executor.map(dedup_record_shard, ranges4.shards() + ranges6.shards()))
+
+        # 各分片已按数值有序，多路归并即得到与普通模式相同的结果
+        singles = heapq.merge(*(iter_shard(path) for path in shard_paths))
+        intervals4 = merge_intervals(heapq.merge(((value, value) for value in singles),
+                                                 ranges4.intervals()))
+        sources = build_sources(intervals4, merge_intervals(ranges6.intervals()), include, exclude)
+        addresses, written, oversized = write_intervals(sources, output_file, cidr, max_expand)
+        report(addresses, written, output_file, skipped, invalid, cidr, oversized)
+
+    except FileNotFoundError:
+        print(f"错误：找不到文件 {input_file}")
+    except Exception as e:
+        print(f"处理过程中发生错误：{str(e)}")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description='IP地址去重工具：支持IPv4/IPv6单地址、CIDR（1.2.3.0/24）与区间（1.2.3.4-1.2.3.99）')
     # 输入文件和输出文件的文件名
-    input_filename = "ips.txt"
-    output_filename = "ips_only.txt"
+    parser.add_argument('input', nargs='?', default='ips.txt', help='输入文件（默认 ips.txt）')
+    parser.add_argument('output', nargs='?', default='ips_only.txt', help='输出文件（默认 ips_only.txt）')
+    parser.add_argument('--cidr', action='store_true', help='把连续地址合并为最小的CIDR块后输出')
+    parser.add_argument('--ipv4-only', action='store_true', help='剔除IPv6条目，只输出IPv4地址')
+    parser.add_argument('--max-expand', type=int, default=DEFAULT_MAX_EXPAND,
+                        help='单个区间展开为逐个地址的上限，超过时直接写为CIDR块（默认 16777216，即 /8）')
+    parser.add_argument('--sharded', action='store_true',
+                        help='分片模式：哈希分片落盘后多进程并行去重，适用于超出内存的超大输入')
+    parser.add_argument('--shards', type=int, default=64, help='分片模式的分片数（默认 64）')
+    parser.add_argument('-j', '--jobs', type=int, default=None,
+                        help='分片模式的并行进程数（默认使用全部CPU核心）')
+    parser.add_argument('--tmp-dir', default=None, help='分片模式的临时目录（默认系统临时目录）')
+    parser.add_argument('--include', action='append', default=[],
+                        help='只保留落在该范围内的地址；可为地址/CIDR/区间列表或已保存的索引文件，可多次指定')
+    parser.add_argument('--exclude', action='append', default=[],
+                        help='剔除落在该范围内的地址；格式同 --include，可多次指定')
+    parser.add_argument('--build-index', action='store_true',
+                        help='把输入文件构建为二进制范围索引保存到输出文件，供 --include/--exclude 复用')
+    args = parser.parse_args()
+
+    if args.shards < 1 or (args.jobs is not None and args.jobs < 1) or args.max_expand < 1:
+        parser.error('--shards、--jobs 和 --max-expand 必须大于等于1')
+
+    if args.build_index:
+        build_index(args.input, args.output)
+        sys.exit(0)
+
+    try:
+        include = MembershipIndex.from_files(args.include) if args.include else None
+        exclude = MembershipIndex.from_files(args.exclude) if args.exclude else None
+    except (OSError, ValueError) as e:
+        print(f"错误：无法加载范围文件：{str(e)}")
+        sys.exit(1)
 
     # 调用处理函数
-    process_ip_addresses(input_filename, output_filename)
+    if args.sharded:
+        process_ip_addresses_sharded(args.input, args.output, args.shards, args.jobs, args.tmp_dir,
+                                     args.cidr, args.ipv4_only, args.max_expand, include, exclude)
+    else:
+        process_ip_addresses(args.input, args.output, args.cidr, args.ipv4_only, args.max_expand,
+                             include, exclude)
@@ -1,38 +1,256 @@
+import argparse
+import hashlib
+import heapq
+import math
+import re
+import shutil
 import sys
 import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
 
+# 随脚本附带的离线公共后缀列表
+DEFAULT_PSL_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'public_suffix_list.dat')
+
+_SCHEME_RE = re.compile(r'^[a-z][a-z0-9+.-]*://')
+_LABEL_RE = re.compile(r'^[a-z0-9_](?:[a-z0-9_-]{0,61}[a-z0-9_])?$')
+_IPV4_RE = re.compile(r'^\d{1,3}(?:\.\d{1,3}){3}$')
+
+
+def iter_input_lines(input_paths):
+    """逐行惰性读取输入，'-' 表示标准输入；文件无法打开时抛出 OSError，不会写出不完整的结果"""
+    for path in input_paths:
+        if path == '-':
+            yield from sys.stdin
+            continue
+        with open(path, 'r', encoding='utf-8') as file:
+            yield from file
+
+
+def check_inputs(input_paths):
+    """检查命名的输入文件能否打开，逐个提示无法打开的文件，全部可读时返回 True"""
+    ok = True
+    for path in input_paths:
+        if path == '-':
+            continue
+        if not os.path.exists(path):
+            print(f"错误：文件 '{path}' 不存在")
+            ok = False
+            continue
+        try:
+            with open(path, 'rb'):
+                pass
+        except OSError as e:
+            print(f"错误：无法打开文件 '{path}'：{e.strerror}")
+            ok = False
+    return ok
+
+
+def normalize_domain(text):
+    """规范化域名：小写、去除协议/路径/端口/用户信息、通配符与首尾点号，并转换为 punycode
+
+    无法规范化为合法域名时返回 None。
+    """
+    domain = text.strip().lower()
+    domain = _SCHEME_RE.sub('', domain)
+    # 去除路径、查询参数和锚点
+    for sep in '/?#':
+        domain = domain.split(sep, 1)[0]
+    domain = domain.rsplit('@', 1)[-1]
+    # 去除端口
+    host, colon, port = domain.rpartition(':')
+    if colon and port.isdigit():
+        domain = host
+    # 去除通配符前缀与首尾点号
+    while domain.startswith(('*.', '.')):
+        domain = domain[1:] if domain.startswith('.') else domain[2:]
+    domain = domain.rstrip('.')
+    if not domain or len(domain) > 253:
+        return None
+    if _IPV4_RE.match(domain):
+        return domain
+
+    labels = []
+    for label in domain.split('.'):
+        if not label.isascii():
+            try:
+                label = label.encode('idna').decode('ascii')
+            except UnicodeError:
+                return None
+        if not _LABEL_RE.match(label):
+            return None
+        labels.append(label)
+    return '.'.join(labels)
+
+
+class PublicSuffixList:
+    """公共后缀列表：按反转标签构建的后缀树，支持通配（*.）与例外（!）规则"""
+
+    def __init__(self, rules):
+        self.root = {}
+        for rule in rules:
+            rule = rule.strip()
+            if not rule or rule.startswith('//'):
+                continue
+            rule = rule.split()[0]
+            exception = rule.startswith('!')
+            node = self.root
+            for label in reversed(rule.lstrip('!').split('.')):
+                label = label if label == '*' or label.isascii() else label.encode('idna').decode('ascii')
+                node = node.setdefault(label, {})
+            node['!' if exception else '$'] = True
+
+    @classmethod
+    def load(cls, path=DEFAULT_PSL_PATH):
+        """从 public_suffix_list.dat 格式的文件加载"""
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls(f)
+
+    def suffix_length(self, reversed_labels):
+        """返回公共后缀包含的标签数；没有匹配规则时按默认规则 * 视为 1"""
+        matched = 1
+        node = self.root
+        for i, label in enumerate(reversed_labels):
+            child = node.get(label)
+            if child is not None and child.get('!'):
+                # 例外规则：后缀为其父级
+                return i
+            wildcard = node.get('*')
+            if wildcard is not None and wildcard.get('$'):
+                matched = max(matched, i + 1)
+            if child is None:
+                break
+            node = child
+            if node.get('$'):
+                matched = max(matched, i + 1)
+        return min(matched, len(reversed_labels))
+
+    def registrable_domain(self, domain):
+        """返回可注册域名（公共后缀加一级）；域名本身即为公共后缀或是 IP 时返回其自身"""
+        if _IPV4_RE.match(domain):
+            return domain
+        labels = domain.split('.')
+        length = self.suffix_length(labels[::-1])
+        if length >= len(labels):
+            return domain
+        return '.'.join(labels[-(length + 1):])
+
+
+class DomainTrie:
+    """按反转标签存储域名的后缀树：相同可注册域名下的子域名聚在同一子树中"""
+
+    _END = ''  # 终止标记（合法标签不会为空）
+
+    def __init__(self):
+        self.root = {}
+        self.size = 0
+
+    def add(self, domain):
+        """插入域名，返回是否为新域名"""
+        node = self.root
+        for label in reversed(domain.split('.')):
+            node = node.setdefault(label, {})
+        if self._END in node:
+            return False
+        node[self._END] = True
+        self.size += 1
+        return True
+
+    def __len__(self):
+        return self.size
+
+    def iter_domains(self, node=None, suffix=()):
+        """按反转标签的字典序产出全部域名（同一主域名下的子域名相邻输出）"""
+        node = self.root if node is None else node
+        if self._END in node:
+            yield '.'.join(reversed(suffix))
+        for label in sorted(k for k in node if k != self._END):
+            yield from self.iter_domains(node[label], suffix + (label,))
+
+    def count_by_root(self, psl):
+        """统计每个可注册域名下的域名数量，按数量降序返回 [(主域名, 数量)]"""
+        counts = {}
+        for domain in self.iter_domains():
+            root = psl.registrable_domain(domain)
+            counts[root] = counts.get(root, 0) + 1
+        return sorted(counts.items(), key=lambda item: (-item[1], item[0]))
+
+
+def normalize_and_group(lines, output_file, roots_file=None, psl_path=None):
+    """规范化模式：规范化后存入域名后缀树去重，并按可注册域名统计数量"""
+    psl = PublicSuffixList.load(psl_path or DEFAULT_PSL_PATH)
+    trie = DomainTrie()
+    total = invalid = 0
+    for line in lines:
+        if not line.strip():
+            continue
+        total += 1
+        domain = normalize_domain(line)
+        if domain is None:
+            invalid += 1
+            continue
+        trie.add(domain)
+
+    roots = trie.count_by_root(psl)
+    print(f"去重前域名数量：{total}")
+    print(f"无效条目数量：{invalid}")
+    print(f"规范化去重后域名数量：{len(trie)}")
+    print(f"可注册主域名数量：{len(roots)}\n")
+
+    with open(output_file, 'w', encoding='utf-8') as file:
+        for domain in trie.iter_domains():
+            file.write(domain + '\n')
+    print(f"处理完成！规范化去重后的域名已保存到 {os.path.abspath(output_file)}")
+
+    if roots_file:
+        with open(roots_file, 'w', encoding='utf-8') as file:
+            for root, count in roots:
+                file.write(f"{root}\t{count}\n")
+        print(f"各主域名的域名数量已保存到 {os.path.abspath(roots_file)}")
+    else:
+        print("\n域名数量最多的主域名：")
+        for root, count in roots[:10]:
+            print(f"  {root}: {count}")
+
+
+def process_domains(input_paths, output_file="SubDomainsResult.txt", echo=False,
+                    normalize=False, roots_file=None, psl_path=None):
+    """流式去重：单次遍历完成计数与去重，只在内存中保留唯一域名
+
+    normalize 为 True 时先规范化域名，再按可注册域名分组统计。
+    """
+    if isinstance(input_paths, str):
+        input_paths = [input_paths]
 
-def process_domains(input_file_path):
     try:
-        # 检查输入文件是否存在
-        if not os.path.exists(input_file_path):
-            print(f"错误：文件 '{input_file_path}' 不存在")
+        if normalize:
+            normalize_and_group(iter_input_lines(input_paths), output_file, roots_file, psl_path)
             return
 
-        # 读取文件内容
-        with open(input_file_path, 'r', encoding='utf-8') as file:
-            content = file.read()
+        total = 0
+        unique_domains = set()
 
-        # 输出原文件内容
-        print(f"文件 '{input_file_path}' 的内容如下：")
-        print("----------------------------------------")
-        print(content)
-        print("----------------------------------------\n")
-
-        # 提取域名并去重
-        domains = content.splitlines()
-        # 过滤空行并去重
-        unique_domains = list({domain.strip() for domain in domains if domain.strip()})
-        unique_domains.sort()  # 排序，保持结果一致性
+        if echo:
+            print("输入内容如下：")
+            print("----------------------------------------")
+        for line in iter_input_lines(input_paths):
+            if echo:
+                print(line, end='' if line.endswith('\n') else '\n')
+            # 过滤空行并去重
+            domain = line.strip()
+            if domain:
+                total += 1
+                unique_domains.add(domain)
+        if echo:
+            print("----------------------------------------\n")
 
         # 输出去重后的域名数量
-        print(f"去重前域名数量：{len([d for d in domains if d.strip()])}")
+        print(f"去重前域名数量：{total}")
         print(f"去重后域名数量：{len(unique_domains)}\n")
 
-        # 写入结果文件
-        output_file = "SubDomainsResult.txt"
+        # 写入结果文件（排序，保持结果一致性）
         with open(output_file, 'w', encoding='utf-8') as file:
-            for domain in unique_domains:
+            for domain in sorted(unique_domains):
                 file.write(domain + '\n')
 
         print(f"处理完成！去重后的域名已保存到 {os.path.abspath(output_file)}")
@@ -41,12 +259,264 @@ def process_domains(input_file_path):
         print(f"处理过程中发生错误：{str(e)}")
 
 
-if __name__ == "__main__":
-    # 检查命令行参数
-    if len(sys.argv) != 2:
-        print("用法：python domain_duplicate_remover.py <输入文件路径>")
-        print("示例：python domain_duplicate_remover.py domains.txt")
+def partition_lines(lines, shard_paths):
+    """按内容哈希把非空行分散写入各分片文件，返回写入的行数（同一内容总落在同一分片）"""
+    files = [open(path, 'w', encoding='utf-8') for path in shard_paths]
+    total = 0
+    try:
+        for line in lines:
+            line = line.strip()
+            if line:
+                total += 1
+                files[hash(line) % len(files)].write(line + '\n')
+    finally:
+        for f in files:
+            f.close()
+    return total
+
+
+def dedup_shard(shard_path):
+    """工作进程：对单个分片去重并排序后原地写回，返回去重后的行数"""
+    with open(shard_path, 'r', encoding='utf-8') as f:
+        unique = {line.rstrip('\n') for line in f}
+    with open(shard_path, 'w', encoding='utf-8') as f:
+        for line in sorted(unique):
+            f.write(line + '\n')
+    return len(unique)
+
+
+def sharded_dedup(input_paths, output_file="SubDomainsResult.txt", shards=64, jobs=None,
+                  tmp_dir=None):
+    """分片模式：先按哈希分片落盘，再由多个工作进程并行去重排序，最后多路归并为全局有序结果
+
+    每个工作进程同一时间只处理一个分片，内存占用约为单个分片的大小。
+    """
+    if isinstance(input_paths, str):
+        input_paths = [input_paths]
+
+    work_dir = tempfile.mkdtemp(prefix='dedup_', dir=tmp_dir)
+    try:
+        shard_paths = [os.path.join(work_dir, f"shard_{i}.txt") for i in range(shards)]
+        total = partition_lines(iter_input_lines(input_paths), shard_paths)
+
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            unique = sum(executor.map(dedup_shard, shard_paths))
+
+        # 各分片已有序且互不重叠，多路归并即得到全局有序的结果
+        sources = [open(path, 'r', encoding='utf-8') for path in shard_paths]
+        try:
+            with open(output_file, 'w', encoding='utf-8') as out:
+                out.writelines(heapq.merge(*sources))
+        finally:
+            for f in sources:
+                f.close()
+    except Exception as e:
+        print(f"处理过程中发生错误：{str(e)}")
+        return
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    print(f"去重前域名数量：{total}")
+    print(f"去重后域名数量：{unique}\n")
+    print(f"处理完成！去重后的域名已保存到 {os.path.abspath(output_file)}")
+
+
+def hash128(text):
+    """返回文本的两个独立 64 位哈希值，供布隆过滤器与 HyperLogLog 共用"""
+    digest = hashlib.blake2b(text.encode('utf-8'), digest_size=16).digest()
+    return int.from_bytes(digest[:8], 'little'), int.from_bytes(digest[8:], 'little')
+
+
+class BloomFilter:
+    """布隆过滤器：以固定内存近似判断元素是否出现过（无漏判，存在一定误判率）"""
+
+    def __init__(self, capacity, error_rate, max_bytes=None):
+        bits = math.ceil(-capacity * math.log(error_rate) / (math.log(2) ** 2))
+        if max_bytes is not None:
+            bits = min(bits, max_bytes * 8)
+        self.size = max(bits, 8)
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def add(self, h1, h2):
+        """插入元素（以两个哈希值表示，采用双重哈希生成各位置），返回是否为新元素"""
+        new = False
+        bits = self.bits
+        for i in range(self.hashes):
+            pos = (h1 + i * h2) % self.size
+            mask = 1 << (pos & 7)
+            if not bits[pos >> 3] & mask:
+                bits[pos >> 3] |= mask
+                new = True
+        if new:
+            self.count += 1
+        return new
+
+    def false_positive_rate(self, count=None):
+        """按已插入数量估算当前误判率 (1 - e^(-kn/m))^k"""
+        count = self.count if count is None else count
+        return (1 - math.exp(-self.hashes * count / self.size)) ** self.hashes
+
+
+class HyperLogLog:
+    """HyperLogLog 基数估计：2^precision 个寄存器，相对标准误差约为 1.04/sqrt(2^precision)"""
+
+    def __init__(self, precision=14):
+        self.precision = precision
+        self.m = 1 << precision
+        self.registers = bytearray(self.m)
+
+    def add(self, h):
+        """以 64 位哈希值更新寄存器"""
+        index = h >> (64 - self.precision)
+        rest = h & ((1 << (64 - self.precision)) - 1)
+        rank = (64 - self.precision) - rest.bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    @property
+    def relative_error(self):
+        return 1.04 / math.sqrt(self.m)
+
+    def estimate(self):
+        """返回基数估计值；估计值较小时采用线性计数修正"""
+        m = self.m
+        alpha = 0.7213 / (1 + 1.079 / m)
+        raw = alpha * m * m / sum(2.0 ** -r for r in self.registers)
+        zeros = self.registers.count(0)
+        if raw <= 2.5 * m and zeros:
+            return m * math.log(m / zeros)
+        return raw
+
+
+def approximate_dedup(input_paths, output_file="SubDomainsResult.txt", capacity=100_000_000,
+                      error_rate=0.001, memory_mb=256, precision=14, count_only=False,
+                      normalize=False):
+    """概率模式：布隆过滤器流式去重（按首次出现顺序写出），HyperLogLog 估计唯一数量
+
+    内存占用固定（由 capacity/error_rate 决定，且不超过 memory_mb），结果附带误差范围。
+    count_only 为 True 时只估计唯一数量，不写出结果。
+    """
+    if isinstance(input_paths, str):
+        input_paths = [input_paths]
+
+    try:
+        hll = HyperLogLog(precision)
+        bloom = None
+        if not count_only:
+            bloom = BloomFilter(capacity, error_rate, max_bytes=memory_mb * 1024 * 1024)
+            if bloom.false_positive_rate(capacity) > error_rate * 1.01:
+                print(f"警告：内存上限 {memory_mb}MB 不足以在 {capacity} 个元素时达到误判率 {error_rate}，"
+                      f"预计误判率为 {bloom.false_positive_rate(capacity):.4%}")
+
+        total = invalid = 0
+        out = open(output_file, 'w', encoding='utf-8') if bloom is not None else None
+        try:
+            for line in iter_input_lines(input_paths):
+                domain = line.strip()
+                if not domain:
+                    continue
+                total += 1
+                if normalize:
+                    domain = normalize_domain(domain)
+                    if domain is None:
+                        invalid += 1
+                        continue
+                h1, h2 = hash128(domain)
+                hll.add(h1)
+                if bloom is not None and bloom.add(h1, h2):
+                    out.write(domain + '\n')
+        finally:
+            if out is not None:
+                out.close()
+
+        estimate = hll.estimate()
+        # 约 95% 置信区间取两倍标准误差
+        margin = 2 * hll.relative_error * estimate
+        print(f"去重前域名数量：{total}")
+        if normalize:
+            print(f"无效条目数量：{invalid}")
+        print(f"唯一域名数量估计：{estimate:.0f}（95% 置信区间 ±{margin:.0f}，"
+              f"相对误差约 ±{2 * hll.relative_error:.2%}）")
+        if bloom is None:
+            return
+
+        fp_rate = bloom.false_positive_rate()
+        print(f"去重后写出域名数量：{bloom.count}")
+        print(f"布隆过滤器：{len(bloom.bits) / 1024 / 1024:.1f}MB，{bloom.hashes} 个哈希函数，"
+              f"当前误判率约 {fp_rate:.4%}（被误判为重复而漏写的唯一域名至多约 "
+              f"{fp_rate * bloom.count:.0f} 个）\n")
+        print(f"处理完成！去重后的域名已保存到 {os.path.abspath(output_file)}")
+
+    except Exception as e:
+        print(f"处理过程中发生错误：{str(e)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='域名去重工具',
+        epilog='示例：python domain_duplicate_remover.py domains.txt more.txt -o result.txt')
+    parser.add_argument('inputs', nargs='*', default=['-'],
+                        help='输入文件路径，可指定多个；省略或为 - 时从标准输入读取')
+    parser.add_argument('-o', '--output', default='SubDomainsResult.txt',
+                        help='结果文件路径（默认 SubDomainsResult.txt）')
+    parser.add_argument('--echo', action='store_true', help='处理时回显输入内容')
+    parser.add_argument('--normalize', action='store_true',
+                        help='规范化域名（小写、punycode、去除协议/端口/通配符/末尾点号）后去重，'
+                             '并按可注册主域名分组输出')
+    parser.add_argument('--roots', default=None, help='规范化模式下把各主域名的域名数量保存到该文件')
+    parser.add_argument('--psl', default=None,
+                        help='公共后缀列表文件（默认使用随附的 public_suffix_list.dat）')
+    parser.add_argument('--sharded', action='store_true',
+                        help='分片模式：哈希分片落盘后多进程并行去重，适用于超出内存的超大输入')
+    parser.add_argument('--shards', type=int, default=64, help='分片模式的分片数（默认 64）')
+    parser.add_argument('-j', '--jobs', type=int, default=None,
+                        help='分片模式的并行进程数（默认使用全部CPU核心）')
+    parser.add_argument('--tmp-dir', default=None, help='分片模式的临时目录（默认系统临时目录）')
+    parser.add_argument('--approx', action='store_true',
+                        help='概率模式：布隆过滤器去重（按首次出现顺序输出）并用 HyperLogLog 估计唯一数量，'
+                             '内存固定且报告误差范围')
+    parser.add_argument('--count-only', action='store_true',
+                        help='概率模式下只估计唯一数量，不写出结果')
+    parser.add_argument('--capacity', type=int, default=100_000_000,
+                        help='概率模式的预计唯一数量，用于确定布隆过滤器大小（默认 1亿）')
+    parser.add_argument('--fp-rate', type=float, default=0.001,
+                        help='概率模式的目标误判率（默认 0.001）')
+    parser.add_argument('--memory-mb', type=int, default=256,
+                        help='概率模式布隆过滤器的内存上限，单位MB（默认 256）')
+    parser.add_argument('--hll-precision', type=int, default=14,
+                        help='HyperLogLog 精度，寄存器数为 2^p（4-18，默认 14，误差约 0.8%%）')
+    args = parser.parse_args()
+
+    # 输入文件无法打开时直接退出，不覆盖已有的结果文件
+    if not check_inputs(args.inputs):
         sys.exit(1)
 
-    input_file_path = sys.argv[1]
-    process_domains(input_file_path)
+    if args.sharded and args.approx:
+        parser.error('--sharded 不能与 --approx 同时使用')
+
+    if args.approx or args.count_only:
+        if args.echo or args.roots:
+            parser.error('--approx 不能与 --echo 或 --roots 同时使用')
+        if args.capacity < 1 or not 0 < args.fp_rate < 1 or args.memory_mb < 1:
+            parser.error('--capacity、--memory-mb 必须大于等于1，--fp-rate 必须介于 0 和 1 之间')
+        if not 4 <= args.hll_precision <= 18:
+            parser.error('--hll-precision 必须介于 4 和 18 之间')
+        approximate_dedup(args.inputs, args.output, args.capacity, args.fp_rate, args.memory_mb,
+                          args.hll_precision, args.count_only, args.normalize)
+        return
+
+    if args.sharded:
+        if args.normalize or args.echo:
+            parser.error('--sharded 不能与 --normalize 或 --echo 同时使用')
+        if args.shards < 1 or (args.jobs is not None and args.jobs < 1):
+            parser.error('--shards 和 --jobs 必须大于等于1')
+        sharded_dedup(args.inputs, args.output, args.shards, args.jobs, args.tmp_dir)
+        return
+
+    process_domains(args.inputs, args.output, args.echo, args.normalize, args.roots, args.psl)
+
+
+if __name__ == "__main__":
+    main()
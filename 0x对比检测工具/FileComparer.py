@@ -1,7 +1,22 @@
 import argparse
+import csv
+import heapq
+import json
+import math
+import os
+import sqlite3
+import sys
+import tempfile
+from datetime import datetime
+from array import array
 from colorama import Fore, Style, init
 from collections import Counter
 
+try:
+    import numpy as np
+except ImportError:  # 摘要模式在没有 NumPy 时退化为纯 Python 排序
+    np = None
+
 
 def read_file(file_path):
     """读取文件内容并返回行的集合、有序列表、计数器和行数统计"""
@@ -29,107 +44,835 @@ def read_file(file_path):
 
 
 def find_differences(file1_lines, file1_counter, file2_lines, file2_counter):
-    """找出两个文件之间的所有差异，包括内容和重复次数"""
-    # 所有出现过的行
-    all_lines = set(file1_counter.keys()).union(set(file2_counter.keys()))
+    """找出两个文件之间的所有差异，包括内容和重复次数
 
-    # 内容差异（只在一个文件中出现的行）
-    only_in_file1 = []
-    only_in_file2 = []
+    每个文件只顺序遍历一次，计数器查找为 O(1)，整体耗时与总行数成线性关系：
+    - 仅在某个文件中出现的行按原文件顺序排列（保留重复出现）
+    - 重复次数差异按在 file1 中首次出现的顺序排列
+    """
+    # 内容差异（只在一个文件中出现的行），按原文件顺序保留每一次出现
+    ordered_only_in_file1 = [line for line in file1_lines if line not in file2_counter]
+    ordered_only_in_file2 = [line for line in file2_lines if line not in file1_counter]
 
-    # 重复次数差异（两行都有但出现次数不同）
+    # 重复次数差异（两行都有但出现次数不同），Counter 保持首次出现的插入顺序
     count_diff = []
-
-    for line in all_lines:
-        count1 = file1_counter.get(line, 0)
+    for line, count1 in file1_counter.items():
         count2 = file2_counter.get(line, 0)
-
-        if count1 > 0 and count2 == 0:
-            # 只在file1中出现的行
-            only_in_file1.extend([line] * count1)
-        elif count2 > 0 and count1 == 0:
-            # 只在file2中出现的行
-            only_in_file2.extend([line] * count2)
-        elif count1 != count2:
-            # 两行都有但出现次数不同
+        if count2 and count1 != count2:
             count_diff.append((line, count1, count2))
 
-    # 按原文件顺序排列仅在file1中出现的行
-    ordered_only_in_file1 = [line for line in file1_lines if line in set(only_in_file1)]
+    return ordered_only_in_file1, ordered_only_in_file2, count_diff
 
-    # 按原文件顺序排列仅在file2中出现的行
-    ordered_only_in_file2 = [line for line in file2_lines if line in set(only_in_file2)]
 
-    return ordered_only_in_file1, ordered_only_in_file2, count_diff
+# 外存模式：分区文件在内存中约占其磁盘大小的倍数（Python 字符串与字典的开销）
+MEMORY_FACTOR = 8
+# 单次分区的最大分区数（同时打开的溢出文件数上限）
+MAX_PARTITIONS = 256
+# 分区后仍超出内存预算时最多再递归分区的层数
+MAX_PARTITION_LEVELS = 3
 
 
-def print_differences(file1_path, file2_path, diff1, diff2, count_diff,
-                      file1_total, file2_total, file1_content, file2_content):
-    """打印差异，包括文件大小比较和多出的内容"""
-    init(autoreset=True)
+class SpillList:
+    """磁盘溢出文件上的只读序列：支持 len、布尔判断与顺序迭代，可直接交给各输出方式"""
 
-    print(f"\n{Fore.CYAN}📊 文件基本信息:{Style.RESET_ALL}")
-    print("─" * 80)
-    print(f"{Fore.WHITE}{file1_path}: 总行数={file1_total}, 有效内容行数={file1_content}{Style.RESET_ALL}")
-    print(f"{Fore.WHITE}{file2_path}: 总行数={file2_total}, 有效内容行数={file2_content}{Style.RESET_ALL}")
-    print("─" * 80 + "\n")
+    def __init__(self, path, length, decode):
+        self.path = path
+        self.length = length
+        self.decode = decode
+
+    def __len__(self):
+        return self.length
+
+    def __iter__(self):
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for record in f:
+                yield self.decode(record.rstrip('\n'))
+
+
+def iter_file_records(file_path, stats):
+    """逐行读取原始文件，产出 (行号, 去除首尾空白后的内容)，跳过空行并统计行数"""
+    with open(file_path, 'r', encoding='utf-8') as file:
+        for index, line in enumerate(file):
+            stats['total'] += 1
+            line = line.strip()
+            if line:
+                stats['content'] += 1
+                yield index, line
+
+
+def iter_spill_records(path):
+    """读取溢出文件中的 (行号, 内容) 记录"""
+    with open(path, 'r', encoding='utf-8') as f:
+        for record in f:
+            index, line = record.rstrip('\n').split('\t', 1)
+            yield int(index), line
+
+
+def partition_records(records, work_dir, tag, num_parts, salt):
+    """按内容的哈希值把记录分散到 num_parts 个溢出文件，返回文件路径列表
+
+    同一内容总是落入同一分区，分区内记录保持行号递增。
+    """
+    paths = [os.path.join(work_dir, f"{tag}_{salt}_{i}.txt") for i in range(num_parts)]
+    files = [open(path, 'w', encoding='utf-8') for path in paths]
+    try:
+        for index, line in records:
+            files[hash((salt, line)) % num_parts].write(f"{index}\t{line}\n")
+    finally:
+        for f in files:
+            f.close()
+    return paths
+
+
+def diff_partition(file1_part, file2_part, work_dir, tag):
+    """在内存中比较一对分区，结果按行号写入三个溢出文件，返回 (路径, 条数) 三元组"""
+    counter1 = Counter(line for _, line in iter_spill_records(file1_part))
+    counter2 = Counter(line for _, line in iter_spill_records(file2_part))
+
+    outputs = [os.path.join(work_dir, f"{tag}_{name}.txt") for name in ('only1', 'only2', 'count')]
+    lengths = [0, 0, 0]
+    with open(outputs[0], 'w', encoding='utf-8') as only1, \
+            open(outputs[2], 'w', encoding='utf-8') as count_diff:
+        reported = set()
+        for index, line in iter_spill_records(file1_part):
+            count2 = counter2.get(line, 0)
+            if not count2:
+                only1.write(f"{index}\t{line}\n")
+                lengths[0] += 1
+            elif counter1[line] != count2 and line not in reported:
+                # 以在 file1 中首次出现的行号作为排序依据
+                reported.add(line)
+                count_diff.write(f"{index}\t{counter1[line]}\t{count2}\t{line}\n")
+                lengths[2] += 1
+    with open(outputs[1], 'w', encoding='utf-8') as only2:
+        for index, line in iter_spill_records(file2_part):
+            if line not in counter1:
+                only2.write(f"{index}\t{line}\n")
+                lengths[1] += 1
+    return list(zip(outputs, lengths))
+
+
+def merge_results(results, work_dir, tag):
+    """把各分区按行号排好序的结果多路归并为一组结果文件"""
+    merged = []
+    for kind in range(3):
+        path = os.path.join(work_dir, f"{tag}_merged_{kind}.txt")
+        sources = [open(result[kind][0], 'r', encoding='utf-8') for result in results]
+        try:
+            with open(path, 'w', encoding='utf-8') as out:
+                out.writelines(heapq.merge(*sources, key=lambda record: int(record.split('\t', 1)[0])))
+        finally:
+            for f in sources:
+                f.close()
+        for result in results:
+            os.remove(result[kind][0])
+        merged.append((path, sum(result[kind][1] for result in results)))
+    return merged
+
+
+def diff_partitioned(records1, records2, size, memory_budget, work_dir, tag, level=0):
+    """把两组记录按哈希分区后逐对比较，分区仍超出预算时递归再分区，最后归并结果"""
+    num_parts = min(MAX_PARTITIONS, max(2, math.ceil(size * MEMORY_FACTOR / memory_budget)))
+    parts1 = partition_records(records1, work_dir, f"{tag}a", num_parts, level)
+    parts2 = partition_records(records2, work_dir, f"{tag}b", num_parts, level)
+
+    results = []
+    for i, (part1, part2) in enumerate(zip(parts1, parts2)):
+        part_size = os.path.getsize(part1) + os.path.getsize(part2)
+        part_tag = f"{tag}{i}_"
+        if part_size * MEMORY_FACTOR <= memory_budget or level + 1 >= MAX_PARTITION_LEVELS:
+            results.append(diff_partition(part1, part2, work_dir, part_tag))
+        else:
+            results.append(diff_partitioned(iter_spill_records(part1), iter_spill_records(part2),
+                                            part_size, memory_budget, work_dir, part_tag,
+                                            level + 1))
+        os.remove(part1)
+        os.remove(part2)
+    return merge_results(results, work_dir, tag)
+
+
+def compare_external(file1_path, file2_path, memory_budget, work_dir):
+    """外存模式比较：结果与内存模式一致，但内存占用受 memory_budget（字节）约束
+
+    两个文件先按内容哈希分区到 work_dir 下的溢出文件，每对分区单独在内存中比较，
+    最后按原始行号多路归并。返回 (diff1, diff2, count_diff, 文件1统计, 文件2统计)，
+    其中差异结果为 SpillList，统计为 (总行数, 有效内容行数)；读取失败时返回 None。
+    """
+    for path in (file1_path, file2_path):
+        if not os.path.isfile(path):
+            print(f"{Fore.RED}错误: 文件 '{path}' 不存在{Style.RESET_ALL}")
+            return None
+
+    stats1 = {'total': 0, 'content': 0}
+    stats2 = {'total': 0, 'content': 0}
+    size = os.path.getsize(file1_path) + os.path.getsize(file2_path)
+    try:
+        (only1, len1), (only2, len2), (counts, len3) = diff_partitioned(
+            iter_file_records(file1_path, stats1), iter_file_records(file2_path, stats2),
+            size, memory_budget, work_dir, 'p')
+    except Exception as e:
+        print(f"{Fore.RED}外存比较时出错: {str(e)}{Style.RESET_ALL}")
+        return None
+
+    def decode_line(record):
+        return record.split('\t', 1)[1]
+
+    def decode_count(record):
+        _, count1, count2, line = record.split('\t', 3)
+        return line, int(count1), int(count2)
+
+    return (SpillList(only1, len1, decode_line), SpillList(only2, len2, decode_line),
+            SpillList(counts, len3, decode_count),
+            (stats1['total'], stats1['content']), (stats2['total'], stats2['content']))
+
+
+# 摘要模式使用 64 位行哈希
+DIGEST_MASK = (1 << 64) - 1
+
+
+def line_digest(line):
+    """计算一行内容的 64 位摘要（同一进程内稳定）"""
+    return hash(line) & DIGEST_MASK
+
+
+def read_file_digests(file_path):
+    """流式读取文件，返回 (按行顺序的 64 位摘要数组, 总行数, 有效内容行数)；每行只占 8 字节"""
+    digests = array('Q')
+    total_lines = 0
+    with open(file_path, 'r', encoding='utf-8') as file:
+        for line in file:
+            total_lines += 1
+            line = line.strip()
+            if line:
+                digests.append(line_digest(line))
+    return digests, total_lines, len(digests)
+
+
+def count_digests(digests):
+    """返回 (升序去重后的摘要, 对应出现次数)；有 NumPy 时向量化完成"""
+    if np is not None:
+        values = np.frombuffer(digests, dtype=np.uint64) if digests else np.empty(0, dtype=np.uint64)
+        return np.unique(values, return_counts=True)
+    unique = array('Q')
+    counts = array('Q')
+    for digest in sorted(digests):
+        if unique and unique[-1] == digest:
+            counts[-1] += 1
+        else:
+            unique.append(digest)
+            counts.append(1)
+    return unique, counts
+
+
+def diff_digest_counts(unique1, counts1, unique2, counts2):
+    """比较两组摘要计数，返回 (仅在1中的摘要集合, 仅在2中的摘要集合, {摘要: (次数1, 次数2)})"""
+    if np is not None:
+        in2 = np.isin(unique1, unique2, assume_unique=True)
+        in1 = np.isin(unique2, unique1, assume_unique=True)
+        common = unique1[in2]
+        common_counts1 = counts1[in2]
+        common_counts2 = counts2[np.searchsorted(unique2, common)]
+        changed = common_counts1 != common_counts2
+        count_diff = dict(zip(common[changed].tolist(),
+                              zip(common_counts1[changed].tolist(), common_counts2[changed].tolist())))
+        return set(unique1[~in2].tolist()), set(unique2[~in1].tolist()), count_diff
+
+    # 纯 Python：两个有序序列的线性归并
+    only1, only2, count_diff = set(), set(), {}
+    i = j = 0
+    while i < len(unique1) or j < len(unique2):
+        if j >= len(unique2) or (i < len(unique1) and unique1[i] < unique2[j]):
+            only1.add(unique1[i])
+            i += 1
+        elif i >= len(unique1) or unique2[j] < unique1[i]:
+            only2.add(unique2[j])
+            j += 1
+        else:
+            if counts1[i] != counts2[j]:
+                count_diff[unique1[i]] = (counts1[i], counts2[j])
+            i += 1
+            j += 1
+    return only1, only2, count_diff
+
+
+def collision_probability(distinct):
+    """distinct 条不同内容的 64 位摘要中至少发生一次碰撞的概率（生日界）"""
+    return -math.expm1(-distinct * (distinct - 1) / 2 / 2 ** 64)
+
+
+def compare_digest(file1_path, file2_path):
+    """摘要模式比较：每行只保存 64 位摘要，结果与内存模式一致（摘要碰撞时除外）
+
+    第一遍读取两个文件的摘要并找出有差异的摘要，第二遍流式重读文件，
+    只取回有差异的原始行文本。返回 (diff1, diff2, count_diff, 文件1统计, 文件2统计, 碰撞概率)，
+    统计为 (总行数, 有效内容行数)；读取失败时返回 None。
+    """
+    try:
+        digests1, file1_total, file1_content = read_file_digests(file1_path)
+        digests2, file2_total, file2_content = read_file_digests(file2_path)
+    except FileNotFoundError as e:
+        print(f"{Fore.RED}错误: 文件 '{e.filename}' 不存在{Style.RESET_ALL}")
+        return None
+    except Exception as e:
+        print(f"{Fore.RED}读取文件时出错: {str(e)}{Style.RESET_ALL}")
+        return None
+
+    unique1, counts1 = count_digests(digests1)
+    del digests1
+    unique2, counts2 = count_digests(digests2)
+    del digests2
+    only1, only2, count_digest_diff = diff_digest_counts(unique1, counts1, unique2, counts2)
+    distinct = len(unique1) + len(unique2) - (len(unique1) - len(only1))
+    del unique1, counts1, unique2, counts2
+
+    # 第二遍：只为有差异的摘要取回原始文本，保持原文件顺序
+    diff1, count_diff = [], []
+    with open(file1_path, 'r', encoding='utf-8') as file:
+        for line in file:
+            line = line.strip()
+            if not line:
+                continue
+            digest = line_digest(line)
+            if digest in only1:
+                diff1.append(line)
+            elif digest in count_digest_diff:
+                count1, count2 = count_digest_diff.pop(digest)
+                count_diff.append((line, count1, count2))
+    diff2 = []
+    if only2:
+        with open(file2_path, 'r', encoding='utf-8') as file:
+            for line in file:
+                line = line.strip()
+                if line and line_digest(line) in only2:
+                    diff2.append(line)
+
+    return (diff1, diff2, count_diff, (file1_total, file1_content), (file2_total, file2_content),
+            collision_probability(distinct))
+
+
+def parse_size(text):
+    """解析带 K/M/G 单位的大小，返回字节数"""
+    units = {'K': 1024, 'M': 1024 ** 2, 'G': 1024 ** 3}
+    text = text.strip().upper().rstrip('B')
+    try:
+        if text and text[-1] in units:
+            return int(float(text[:-1]) * units[text[-1]])
+        return int(text)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"无效的大小: {text}")
 
-    # 显示内容数量对比
-    print(f"{Fore.CYAN}📈 内容数量对比:{Style.RESET_ALL}")
-    print("─" * 80)
-    if file1_content > file2_content:
-        diff_count = file1_content - file2_content
-        print(f"{Fore.GREEN}{file1_path} 比 {file2_path} 多 {diff_count} 行内容{Style.RESET_ALL}")
-    elif file2_content > file1_content:
-        diff_count = file2_content - file1_content
-        print(f"{Fore.GREEN}{file2_path} 比 {file1_path} 多 {diff_count} 行内容{Style.RESET_ALL}")
-    else:
-        print(f"{Fore.GREEN}两个文件的有效内容行数相同{Style.RESET_ALL}")
-    print("─" * 80 + "\n")
 
-    # 检查是否有任何差异
-    has_differences = len(diff1) > 0 or len(diff2) > 0 or len(count_diff) > 0
+class Palette:
+    """终端配色：关闭颜色时所有颜色代码均为空字符串"""
 
-    if not has_differences:
-        print(f"{Fore.GREEN}✅ 两个文件内容完全相同（包括相同的重复行）{Style.RESET_ALL}\n")
+    def __init__(self, enabled):
+        for name in ('RED', 'CYAN', 'WHITE', 'GREEN', 'YELLOW', 'BLUE', 'MAGENTA'):
+            setattr(self, name, getattr(Fore, name) if enabled else '')
+        self.RESET = Style.RESET_ALL if enabled else ''
+
+
+def console_palette(color=None, stream=None):
+    """初始化终端并返回配色
+
+    先调用 colorama 的 init() 包装 sys.stdout（Windows 控制台依赖它把 ANSI 序列转换为系统调用），
+    因此调用方须在此之后再读取 sys.stdout。color 为 None 时，输出不是终端或设置了 NO_COLOR
+    环境变量则关闭颜色。
+    """
+    init(autoreset=True)
+    stream = stream or sys.stdout
+    if color is None:
+        color = stream.isatty() and 'NO_COLOR' not in os.environ
+    return Palette(color)
+
+
+class BufferedOutput:
+    """合并小块写入，累计到一定大小后一次性写出，避免逐行 print 的开销"""
+
+    def __init__(self, stream, buffer_size=1 << 16):
+        self.stream = stream
+        self.buffer_size = buffer_size
+        self.parts = []
+        self.size = 0
+
+    def write(self, text):
+        self.parts.append(text)
+        self.size += len(text)
+        if self.size >= self.buffer_size:
+            self.flush()
+
+    def flush(self):
+        if self.parts:
+            self.stream.write(''.join(self.parts))
+            self.parts = []
+            self.size = 0
+        self.stream.flush()
+
+
+class ConsoleReporter:
+    """终端输出：文件信息、数量对比和（非摘要模式下的）详细差异
+
+    输出不是终端（如重定向到文件或管道）或设置了 NO_COLOR 环境变量时自动关闭颜色。
+    """
+
+    def __init__(self, stream=None, color=None, summary_only=False):
+        # 先初始化 colorama，再读取（可能已被包装的）sys.stdout
+        self.c = console_palette(color, stream)
+        self.stream = stream or sys.stdout
+        self.summary_only = summary_only
+
+    def report(self, file1_path, file2_path, diff1, diff2, count_diff,
+               file1_total, file2_total, file1_content, file2_content):
+        c = self.c
+        out = BufferedOutput(self.stream)
+        rule = "─" * 80 + "\n"
+
+        out.write(f"\n{c.CYAN}📊 文件基本信息:{c.RESET}\n{rule}")
+        out.write(f"{c.WHITE}{file1_path}: 总行数={file1_total}, 有效内容行数={file1_content}{c.RESET}\n")
+        out.write(f"{c.WHITE}{file2_path}: 总行数={file2_total}, 有效内容行数={file2_content}{c.RESET}\n")
+        out.write(rule + "\n")
+
+        # 显示内容数量对比
+        out.write(f"{c.CYAN}📈 内容数量对比:{c.RESET}\n{rule}")
+        if file1_content > file2_content:
+            diff_count = file1_content - file2_content
+            out.write(f"{c.GREEN}{file1_path} 比 {file2_path} 多 {diff_count} 行内容{c.RESET}\n")
+        elif file2_content > file1_content:
+            diff_count = file2_content - file1_content
+            out.write(f"{c.GREEN}{file2_path} 比 {file1_path} 多 {diff_count} 行内容{c.RESET}\n")
+        else:
+            out.write(f"{c.GREEN}两个文件的有效内容行数相同{c.RESET}\n")
+        out.write(rule + "\n")
+
+        # 检查是否有任何差异
+        if not (len(diff1) or len(diff2) or len(count_diff)):
+            out.write(f"{c.GREEN}✅ 两个文件内容完全相同（包括相同的重复行）{c.RESET}\n\n")
+            out.flush()
+            return
+
+        if self.summary_only:
+            out.write(f"{c.CYAN}🔍 差异统计:{c.RESET}\n{rule}")
+            out.write(f"{c.YELLOW}仅在 {file1_path} 中存在: {len(diff1)} 行{c.RESET}\n")
+            out.write(f"{c.YELLOW}仅在 {file2_path} 中存在: {len(diff2)} 行{c.RESET}\n")
+            out.write(f"{c.YELLOW}出现次数不同: {len(count_diff)} 行{c.RESET}\n")
+            out.write(rule + "\n")
+            out.flush()
+            return
+
+        out.write(f"{c.CYAN}🔍 详细差异内容:{c.RESET}\n\n")
+
+        # 打印只在某一个文件中存在的内容
+        for path, lines, color in ((file1_path, diff1, c.BLUE), (file2_path, diff2, c.MAGENTA)):
+            if not len(lines):
+                continue
+            out.write(f"{c.YELLOW}📄 仅在 {path} 中存在的内容 ({len(lines)} 行):{c.RESET}\n{rule}")
+            for i, line in enumerate(lines, 1):
+                out.write(f"{color}{i}. {line}{c.RESET}\n")
+            out.write(rule + "\n")
+
+        # 打印出现次数不同的内容
+        if len(count_diff):
+            out.write(f"{c.YELLOW}🔄 内容相同但出现次数不同的行:{c.RESET}\n{rule}")
+            for line, count1, count2 in count_diff:
+                out.write(f"{c.YELLOW}{line}{c.RESET}\n"
+                          f"  {c.BLUE}{file1_path}: 出现 {count1} 次{c.RESET}\n"
+                          f"  {c.MAGENTA}{file2_path}: 出现 {count2} 次{c.RESET}\n"
+                          "  " + "-" * 76 + "\n")
+            out.write(rule + "\n")
+        out.flush()
+
+
+class FileReporter:
+    """把差异分别写入输出目录下的 only_in_file1.txt、only_in_file2.txt 和 count_diff.tsv"""
+
+    def __init__(self, output_dir):
+        self.output_dir = output_dir
+
+    def report(self, file1_path, file2_path, diff1, diff2, count_diff,
+               file1_total, file2_total, file1_content, file2_content):
+        os.makedirs(self.output_dir, exist_ok=True)
+        buffering = 1 << 20
+        for name, lines in (('only_in_file1.txt', diff1), ('only_in_file2.txt', diff2)):
+            with open(os.path.join(self.output_dir, name), 'w', encoding='utf-8',
+                      buffering=buffering) as f:
+                f.writelines(line + '\n' for line in lines)
+        with open(os.path.join(self.output_dir, 'count_diff.tsv'), 'w', encoding='utf-8',
+                  buffering=buffering) as f:
+            f.write(f"line\t{file1_path}\t{file2_path}\n")
+            f.writelines(f"{line}\t{count1}\t{count2}\n" for line, count1, count2 in count_diff)
+        print(f"差异结果已保存到目录 {os.path.abspath(self.output_dir)}", file=sys.stderr)
+
+
+class JsonlReporter:
+    """以 JSON Lines 输出差异，每条差异一行；path 为 '-' 时写到标准输出"""
+
+    def __init__(self, path):
+        self.path = path
+
+    def report(self, file1_path, file2_path, diff1, diff2, count_diff,
+               file1_total, file2_total, file1_content, file2_content):
+        if self.path == '-':
+            self._write(sys.stdout, file1_path, file2_path, diff1, diff2, count_diff,
+                        file1_total, file2_total, file1_content, file2_content)
+            sys.stdout.flush()
+            return
+        with open(self.path, 'w', encoding='utf-8', buffering=1 << 20) as f:
+            self._write(f, file1_path, file2_path, diff1, diff2, count_diff,
+                        file1_total, file2_total, file1_content, file2_content)
+
+    def _write(self, f, file1_path, file2_path, diff1, diff2, count_diff,
+               file1_total, file2_total, file1_content, file2_content):
+        dumps = json.dumps
+        f.write(dumps({'type': 'summary', 'file1': file1_path, 'file2': file2_path,
+                       'file1_total': file1_total, 'file1_content': file1_content,
+                       'file2_total': file2_total, 'file2_content': file2_content,
+                       'only_in_file1': len(diff1), 'only_in_file2': len(diff2),
+                       'count_diff': len(count_diff)}, ensure_ascii=False) + '\n')
+        f.writelines(dumps({'type': 'only_in_file1', 'line': line}, ensure_ascii=False) + '\n'
+                     for line in diff1)
+        f.writelines(dumps({'type': 'only_in_file2', 'line': line}, ensure_ascii=False) + '\n'
+                     for line in diff2)
+        f.writelines(dumps({'type': 'count_diff', 'line': line, 'count1': count1,
+                            'count2': count2}, ensure_ascii=False) + '\n'
+                     for line, count1, count2 in count_diff)
+
+
+def print_differences(file1_path, file2_path, diff1, diff2, count_diff,
+                      file1_total, file2_total, file1_content, file2_content):
+    """打印差异，包括文件大小比较和多出的内容"""
+    ConsoleReporter().report(file1_path, file2_path, diff1, diff2, count_diff,
+                             file1_total, file2_total, file1_content, file2_content)
+
+
+def build_reporters(args):
+    """根据命令行参数组合输出方式：写出到文件时终端只显示摘要，JSONL 写到标准输出时不再打印终端报告"""
+    reporters = []
+    if args.output_dir:
+        reporters.append(FileReporter(args.output_dir))
+    if args.jsonl:
+        reporters.append(JsonlReporter(args.jsonl))
+    if args.jsonl != '-':
+        summary_only = args.summary_only or bool(reporters)
+        color = False if args.no_color else None
+        reporters.append(ConsoleReporter(color=color, summary_only=summary_only))
+    return reporters
+
+
+def report_differences(reporters, *result):
+    """依次交给每个输出方式处理"""
+    for reporter in reporters:
+        reporter.report(*result)
+
+
+class BaselineStore:
+    """持久化基线库（SQLite）：记录每条内容首次/最后出现的批次，用于每日增量比较
+
+    每合并一份新快照只需流式读取该快照一次，无需重读历史文件；
+    合并后即可查询相对上一批次新增和消失的内容。
+    """
+
+    def __init__(self, db_path):
+        self.conn = sqlite3.connect(db_path)
+        self.conn.executescript('''
+            CREATE TABLE IF NOT EXISTS runs (
+                id INTEGER PRIMARY KEY,
+                name TEXT NOT NULL,
+                created TEXT NOT NULL,
+                line_count INTEGER NOT NULL DEFAULT 0
+            );
+            CREATE TABLE IF NOT EXISTS entries (
+                line TEXT PRIMARY KEY,
+                first_seen INTEGER NOT NULL,
+                last_seen INTEGER NOT NULL,
+                seen_before INTEGER
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS entries_last_seen ON entries (last_seen);
+        ''')
+
+    def close(self):
+        """关闭数据库连接"""
+        self.conn.close()
+
+    def last_run(self):
+        """返回最近一个批次的 (id, 名称)，库为空时返回 None"""
+        return self.conn.execute('SELECT id, name FROM runs ORDER BY id DESC LIMIT 1').fetchone()
+
+    def merge_snapshot(self, file_path, run_name=None, batch_size=10000):
+        """把一份快照合并为新批次，返回 (新批次 id, 上一批次 id 或 None, 有效内容行数)
+
+        seen_before 记录本批次更新前的 last_seen，用于识别消失后又重新出现的内容。
+        """
+        previous = self.last_run()
+        with self.conn:
+            cursor = self.conn.execute(
+                'INSERT INTO runs (name, created) VALUES (?, ?)',
+                (run_name or os.path.basename(file_path), datetime.now().isoformat(timespec='seconds')))
+            run_id = cursor.lastrowid
+
+            content = 0
+            batch = []
+            upsert = '''
+                INSERT INTO entries (line, first_seen, last_seen, seen_before) VALUES (?, ?, ?, NULL)
+                ON CONFLICT (line) DO UPDATE SET
+                    seen_before = CASE WHEN entries.last_seen = excluded.last_seen
+                                       THEN entries.seen_before ELSE entries.last_seen END,
+                    last_seen = excluded.last_seen
+            '''
+            with open(file_path, 'r', encoding='utf-8') as file:
+                for line in file:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    content += 1
+                    batch.append((line, run_id, run_id))
+                    if len(batch) >= batch_size:
+                        self.conn.executemany(upsert, batch)
+                        batch = []
+            if batch:
+                self.conn.executemany(upsert, batch)
+            self.conn.execute('UPDATE runs SET line_count = ? WHERE id = ?', (content, run_id))
+
+        return run_id, previous[0] if previous else None, content
+
+    def iter_added(self, run_id, previous_id):
+        """产出本批次相对上一批次新增的内容（含消失后重新出现的内容）"""
+        rows = self.conn.execute(
+            '''SELECT line FROM entries WHERE last_seen = ?
+               AND (seen_before IS NULL OR seen_before IS NOT ?)''',
+            (run_id, previous_id))
+        for (line,) in rows:
+            yield line
+
+    def iter_removed(self, previous_id):
+        """产出上一批次存在、本批次消失的内容"""
+        if previous_id is None:
+            return
+        for (line,) in self.conn.execute('SELECT line FROM entries WHERE last_seen = ?',
+                                         (previous_id,)):
+            yield line
+
+
+def update_baseline(db_path, snapshot_path, run_name=None, added_out=None, removed_out=None,
+                    color=None):
+    """基线模式入口：合并新快照并输出相对上一批次新增、消失的内容"""
+    c = console_palette(color)
+    if not os.path.isfile(snapshot_path):
+        print(f"{c.RED}错误: 文件 '{snapshot_path}' 不存在{c.RESET}")
         return
 
-    print(f"{Fore.CYAN}🔍 详细差异内容:{Style.RESET_ALL}\n")
+    store = BaselineStore(db_path)
+    try:
+        run_id, previous_id, content = store.merge_snapshot(snapshot_path, run_name)
+        print(f"\n{c.CYAN}📦 已合并快照 {snapshot_path}（批次 #{run_id}，有效内容行数={content}）"
+              f"{c.RESET}")
+        if previous_id is None:
+            print(f"{c.GREEN}这是基线库中的第一个批次，已建立初始基线{c.RESET}\n")
+            return
+
+        for title, lines, out_path, color in (
+                ("新增的内容", store.iter_added(run_id, previous_id), added_out, c.GREEN),
+                ("消失的内容", store.iter_removed(previous_id), removed_out, c.MAGENTA)):
+            print(f"{c.YELLOW}📄 相对批次 #{previous_id} {title}:{c.RESET}")
+            print("─" * 80)
+            count = 0
+            out = open(out_path, 'w', encoding='utf-8') if out_path else None
+            try:
+                for count, line in enumerate(lines, 1):
+                    if out:
+                        out.write(line + '\n')
+                    else:
+                        print(f"{color}{count}. {line}{c.RESET}")
+            finally:
+                if out:
+                    out.close()
+            if out_path:
+                print(f"共 {count} 行，已保存到 {os.path.abspath(out_path)}")
+            else:
+                print(f"共 {count} 行")
+            print("─" * 80 + "\n")
+    finally:
+        store.close()
+
+
+def build_membership(file_paths, c=None):
+    """N 路比较：每个文件只读一遍，构建 行内容 -> 位掩码 的成员表（第 i 位表示出现在第 i 个文件中）
+
+    成员表按内容首次出现的顺序排列；返回 (成员表, 每个文件的 (总行数, 有效内容行数, 唯一行数))，
+    读取失败时返回 (None, None)。c 为输出错误信息所用的配色。
+    """
+    c = c or Palette(True)
+    membership = {}
+    stats = []
+    for i, file_path in enumerate(file_paths):
+        bit = 1 << i
+        total = content = unique = 0
+        try:
+            with open(file_path, 'r', encoding='utf-8') as file:
+                for line in file:
+                    total += 1
+                    line = line.strip()
+                    if not line:
+                        continue
+                    content += 1
+                    mask = membership.get(line, 0)
+                    if not mask & bit:
+                        unique += 1
+                        membership[line] = mask | bit
+        except FileNotFoundError:
+            print(f"{c.RED}错误: 文件 '{file_path}' 不存在{c.RESET}")
+            return None, None
+        except Exception as e:
+            print(f"{c.RED}读取文件 '{file_path}' 时出错: {str(e)}{c.RESET}")
+            return None, None
+        stats.append((total, content, unique))
+    return membership, stats
+
+
+def parse_membership_query(query, file_paths):
+    """解析 N 路查询，返回 (说明文字, 位掩码判断函数)
+
+    支持的查询（X、K 为从 1 开始的文件序号或文件路径）：
+    all（所有文件都有）、only:X（仅 X 有）、missing:X（除 X 外都有）、since:K（第 K 个文件之后才首次出现）
+    """
+    n = len(file_paths)
+    full = (1 << n) - 1
+    name, _, arg = query.partition(':')
+
+    def file_index(value):
+        if value in file_paths:
+            return file_paths.index(value)
+        if value.isdigit() and 1 <= int(value) <= n:
+            return int(value) - 1
+        raise argparse.ArgumentTypeError(f"查询 '{query}' 中的文件 '{value}' 无效")
+
+    if name == 'all' and not arg:
+        return "所有文件中都存在的内容", lambda mask: mask == full
+    if name == 'only':
+        i = file_index(arg)
+        return f"仅在 {file_paths[i]} 中存在的内容", lambda mask: mask == 1 << i
+    if name == 'missing':
+        i = file_index(arg)
+        return f"仅 {file_paths[i]} 缺少的内容", lambda mask: mask == full & ~(1 << i)
+    if name == 'since':
+        k = file_index(arg) + 1
+        earlier = (1 << k) - 1
+        return (f"在 {file_paths[k - 1]} 之后才首次出现的内容",
+                lambda mask: not mask & earlier)
+    raise argparse.ArgumentTypeError(f"无效的查询: {query}（支持 all、only:X、missing:X、since:K）")
+
+
+def write_membership_matrix(membership, file_paths, output_path):
+    """把成员表写为 CSV 矩阵：每行一条内容，每个文件一列（1 表示存在）"""
+    with open(output_path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['line'] + list(file_paths))
+        n = len(file_paths)
+        for line, mask in membership.items():
+            writer.writerow([line] + [(mask >> i) & 1 for i in range(n)])
+
+
+def compare_many(file_paths, queries, matrix_path=None, color=None):
+    """N 路比较入口：一次读取全部文件，输出各文件统计、查询结果和可选的成员矩阵"""
+    c = console_palette(color)
+    try:
+        parsed = [parse_membership_query(query, file_paths) for query in queries]
+    except argparse.ArgumentTypeError as e:
+        print(f"{c.RED}错误: {e}{c.RESET}")
+        return
 
-    # 打印只在file1中存在的内容
-    if diff1:
-        print(f"{Fore.YELLOW}📄 仅在 {file1_path} 中存在的内容 ({len(diff1)} 行):{Style.RESET_ALL}")
-        print("─" * 80)
-        for i, line in enumerate(diff1, 1):
-            print(f"{Fore.BLUE}{i}. {line}{Style.RESET_ALL}")
-        print("─" * 80 + "\n")
+    membership, stats = build_membership(file_paths, c)
+    if membership is None:
+        return
 
-    # 打印只在file2中存在的内容
-    if diff2:
-        print(f"{Fore.YELLOW}📄 仅在 {file2_path} 中存在的内容 ({len(diff2)} 行):{Style.RESET_ALL}")
-        print("─" * 80)
-        for i, line in enumerate(diff2, 1):
-            print(f"{Fore.MAGENTA}{i}. {line}{Style.RESET_ALL}")
-        print("─" * 80 + "\n")
+    print(f"\n{c.CYAN}📊 文件基本信息（共 {len(file_paths)} 个文件，"
+          f"{len(membership)} 条不同内容）:{c.RESET}")
+    print("─" * 80)
+    for file_path, (total, content, unique) in zip(file_paths, stats):
+        print(f"{c.WHITE}{file_path}: 总行数={total}, 有效内容行数={content}, "
+              f"唯一内容数={unique}{c.RESET}")
+    print("─" * 80 + "\n")
 
-    # 打印出现次数不同的内容
-    if count_diff:
-        print(f"{Fore.YELLOW}🔄 内容相同但出现次数不同的行:{Style.RESET_ALL}")
+    for title, predicate in parsed:
+        lines = [line for line, mask in membership.items() if predicate(mask)]
+        print(f"{c.YELLOW}📄 {title} ({len(lines)} 行):{c.RESET}")
         print("─" * 80)
-        for line, count1, count2 in count_diff:
-            print(f"{Fore.YELLOW}{line}{Style.RESET_ALL}")
-            print(f"  {Fore.BLUE}{file1_path}: 出现 {count1} 次{Style.RESET_ALL}")
-            print(f"  {Fore.MAGENTA}{file2_path}: 出现 {count2} 次{Style.RESET_ALL}")
-            print("  " + "-" * 76)
+        for i, line in enumerate(lines, 1):
+            print(f"{c.BLUE}{i}. {line}{c.RESET}")
         print("─" * 80 + "\n")
 
+    if matrix_path:
+        write_membership_matrix(membership, file_paths, matrix_path)
+        print(f"{c.GREEN}成员矩阵已保存到 {os.path.abspath(matrix_path)}{c.RESET}")
+
 
 def main():
     parser = argparse.ArgumentParser(description='比较两个文本文件的内容差异并显示多出的内容')
-    parser.add_argument('--case1', required=True, help='第一个要比较的文件路径')
-    parser.add_argument('--case2', required=True, help='第二个要比较的文件路径')
+    parser.add_argument('--case1', help='第一个要比较的文件路径')
+    parser.add_argument('--case2', help='第二个要比较的文件路径')
+    parser.add_argument('--digest', action='store_true',
+                        help='摘要模式：每行只保存 64 位哈希，仅为有差异的行重读原文，大幅降低内存占用')
+    parser.add_argument('--summary-only', action='store_true', help='只输出文件信息与差异数量，不列出差异内容')
+    parser.add_argument('--output-dir', default=None,
+                        help='把仅在文件1/文件2中的内容和次数差异分别写入该目录（终端只显示摘要）')
+    parser.add_argument('--jsonl', default=None,
+                        help='以 JSON Lines 格式写出差异到该文件，- 表示标准输出')
+    parser.add_argument('--no-color', action='store_true', help='关闭彩色输出（非终端时自动关闭）')
+    parser.add_argument('--baseline', default=None,
+                        help='基线模式：持久化基线库路径（SQLite），与 --snapshot 一起使用')
+    parser.add_argument('--snapshot', default=None, help='基线模式：要合并的新快照文件')
+    parser.add_argument('--run-name', default=None, help='基线模式：批次名称（默认为快照文件名）')
+    parser.add_argument('--added-out', default=None, help='基线模式：把新增内容保存到该文件')
+    parser.add_argument('--removed-out', default=None, help='基线模式：把消失内容保存到该文件')
+    parser.add_argument('--files', nargs='+', metavar='FILE',
+                        help='N 路比较模式：按时间顺序列出多个快照文件，每个文件只读取一次')
+    parser.add_argument('--query', action='append', default=[],
+                        help='N 路查询，可多次指定：all、only:X、missing:X、since:K'
+                             '（X、K 为从 1 开始的文件序号或文件路径；默认 all）')
+    parser.add_argument('--matrix', default=None, help='N 路模式下把成员矩阵保存为 CSV 文件')
+    parser.add_argument('--external', action='store_true',
+                        help='外存模式：分区溢出到临时文件后再比较，用于超过内存大小的文件')
+    parser.add_argument('--memory-budget', type=parse_size, default=parse_size('512M'),
+                        help='外存模式的内存预算，支持 K/M/G 单位（默认 512M）')
+    parser.add_argument('--tmp-dir', default=None, help='外存模式的临时目录（默认系统临时目录）')
 
     args = parser.parse_args()
+    # 尽早初始化 colorama，读取阶段的错误信息在 Windows 控制台中也能正确着色
+    init(autoreset=True)
+    color = False if args.no_color else None
+
+    if args.baseline or args.snapshot:
+        if not (args.baseline and args.snapshot):
+            parser.error('基线模式需要同时指定 --baseline 和 --snapshot')
+        update_baseline(args.baseline, args.snapshot, args.run_name,
+                        args.added_out, args.removed_out, color)
+        return
+
+    if args.files:
+        if args.case1 or args.case2:
+            parser.error('--files 不能与 --case1/--case2 同时使用')
+        compare_many(args.files, args.query or ['all'], args.matrix, color)
+        return
+    if not args.case1 or not args.case2:
+        parser.error('需要同时指定 --case1 和 --case2（或使用 --files 进行 N 路比较）')
+
+    if args.digest:
+        result = compare_digest(args.case1, args.case2)
+        if result is None:
+            return
+        diff1, diff2, count_diff, (file1_total, file1_content), (file2_total, file2_content), p = result
+        print(f"\n🔐 摘要模式: 64 位行哈希，发生碰撞（可能漏报差异）的概率约为 {p:.3g}", file=sys.stderr)
+        report_differences(build_reporters(args), args.case1, args.case2, diff1, diff2, count_diff,
+                           file1_total, file2_total, file1_content, file2_content)
+        return
+
+    if args.external:
+        with tempfile.TemporaryDirectory(prefix='filecomparer_', dir=args.tmp_dir) as work_dir:
+            result = compare_external(args.case1, args.case2, args.memory_budget, work_dir)
+            if result is None:
+                return
+            diff1, diff2, count_diff, (file1_total, file1_content), (file2_total, file2_content) = result
+            report_differences(build_reporters(args), args.case1, args.case2, diff1, diff2,
+                               count_diff, file1_total, file2_total, file1_content, file2_content)
+        return
 
     # 读取两个文件
     file1_set, file1_lines, file1_counter, file1_total, file1_content = read_file(args.case1)
@@ -143,9 +886,9 @@ def main():
     diff1, diff2, count_diff = find_differences(file1_lines, file1_counter,
                                                 file2_lines, file2_counter)
 
-    # 打印差异
-    print_differences(args.case1, args.case2, diff1, diff2, count_diff,
-                      file1_total, file2_total, file1_content, file2_content)
+    # 输出差异
+    report_differences(build_reporters(args), args.case1, args.case2, diff1, diff2, count_diff,
+                       file1_total, file2_total, file1_content, file2_content)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,53 @@
+"""find_differences 规模基准测试：验证耗时随行数线性增长
+
+用法：python benchmark_find_differences.py [--max 10000000]
+"""
+import argparse
+import random
+import time
+from collections import Counter
+
+from FileComparer import find_differences
+
+
+def make_lines(count, seed):
+    """生成模拟资产列表：约 10% 的行与另一份不同，约 5% 的行重复出现"""
+    rng = random.Random(seed)
+    lines = []
+    for i in range(count):
+        if rng.random() < 0.1:
+            lines.append(f"host-{seed}-{i}.example.com")
+        else:
+            lines.append(f"host-{rng.randrange(count)}.example.com")
+    return lines
+
+
+def run(sizes):
+    print(f"{'行数':>12} {'耗时(秒)':>10} {'每百万行耗时(秒)':>18}")
+    for size in sizes:
+        file1_lines = make_lines(size, 1)
+        file2_lines = make_lines(size, 2)
+        file1_counter = Counter(file1_lines)
+        file2_counter = Counter(file2_lines)
+
+        start = time.perf_counter()
+        find_differences(file1_lines, file1_counter, file2_lines, file2_counter)
+        elapsed = time.perf_counter() - start
+        print(f"{size:>12} {elapsed:>10.3f} {elapsed / size * 1_000_000:>18.3f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='find_differences 规模基准测试')
+    parser.add_argument('--max', type=int, default=10_000_000, help='最大行数（默认 1000 万）')
+    args = parser.parse_args()
+
+    sizes = []
+    size = 10_000
+    while size <= args.max:
+        sizes.append(size)
+        size *= 10
+    run(sizes)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,28 @@
+import argparse
 import os
 import re
+import shutil
+import tempfile
+from collections import Counter
+
+# 可用颜色：名称 -> 颜色代码
+COLORS = {
+    "浅粉红": "#FFB6C1",
+    "猩红": "#DC143C",
+    "紫色": "#800080",
+    "靛青": "#4B0082",
+    "纯蓝": "#0000FF",
+    "道奇蓝": "#1E90FF",
+    "青色": "#00FFFF",
+    "森林绿": "#228B22",
+    "纯黄": "#FFFF00",
+    "金": "#FFD700",
+    "浅灰色": "#D3D3D3"
+}
+
+_COLOR_CODE_RE = re.compile(r'^#(?:[0-9a-fA-F]{3}|[0-9a-fA-F]{6}|[0-9a-fA-F]{8})$')
+# 已经添加过背景色的片段，批量模式中原样保留，避免重复嵌套
+_FONT_TAG = r'<font\b[^>]*>.*?</font>'
 
 
 def get_md_files():
@@ -13,19 +36,7 @@ def get_md_files():
 
 def show_color_options():
     """显示可用的颜色选项并返回颜色字典"""
-    colors = {
-        "浅粉红": "#FFB6C1",
-        "猩红": "#DC143C",
-        "紫色": "#800080",
-        "靛青": "#4B0082",
-        "纯蓝": "#0000FF",
-        "道奇蓝": "#1E90FF",
-        "青色": "#00FFFF",
-        "森林绿": "#228B22",
-        "纯黄": "#FFFF00",
-        "金": "#FFD700",
-        "浅灰色": "#D3D3D3"
-    }
+    colors = COLORS
 
     print("\n🎨 可用颜色选项:")
     for i, (name, code) in enumerate(colors.items(), 1):
@@ -40,6 +51,22 @@ def show_color_options():
     return colors
 
 
+def write_atomic(filename, content):
+    """先写入同目录下的临时文件再替换原文件，写入中途出错也不会损坏原文件"""
+    directory = os.path.dirname(os.path.abspath(filename))
+    fd, tmp_path = tempfile.mkstemp(prefix='.md_highlighter_', suffix='.tmp', dir=directory)
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(content)
+        # mkstemp 创建的文件权限为 0600，替换前沿用原文件的权限
+        if os.path.exists(filename):
+            shutil.copymode(filename, tmp_path)
+        os.replace(tmp_path, filename)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
 def modify_md_file(filename, target_text, color_code, color_name):
     """修改markdown文件，为目标文字添加背景色"""
     try:
@@ -55,8 +82,7 @@ def modify_md_file(filename, target_text, color_code, color_name):
         new_content = pattern.sub(replacement, content)
 
         # 写回文件
-        with open(filename, 'w', encoding='utf-8') as f:
-            f.write(new_content)
+        write_atomic(filename, new_content)
 
         print("\n" + "=" * 40)
         print("✅ 处理成功完成！")
@@ -73,6 +99,91 @@ def modify_md_file(filename, target_text, color_code, color_name):
         return False
 
 
+def load_term_colors(mapping_file):
+    """读取 术语->颜色 映射文件
+
+    每行一条：术语 与 颜色 之间用制表符或 = 分隔，颜色可为颜色名称（如 金）或代码（如 #FFD700）；
+    空行与以 # 开头的行被忽略。返回 {术语: 颜色代码}，格式有误时抛出 ValueError。
+    """
+    term_colors = {}
+    with open(mapping_file, 'r', encoding='utf-8-sig') as f:
+        for line_no, line in enumerate(f, 1):
+            line = line.rstrip('\r\n')
+            if not line.strip() or line.startswith('#'):
+                continue
+            sep = '\t' if '\t' in line else '='
+            term, found, color = line.rpartition(sep)
+            term, color = term.strip(), color.strip()
+            if not found or not term:
+                raise ValueError(f"第 {line_no} 行格式错误，应为 术语=颜色: {line}")
+            code = COLORS.get(color, color)
+            if not _COLOR_CODE_RE.match(code):
+                raise ValueError(f"第 {line_no} 行颜色无效: {color}")
+            term_colors[term] = code
+    return term_colors
+
+
+def build_term_pattern(terms):
+    """把全部术语编译为一个交替正则：先匹配已有的背景色标签，其余按长度降序优先匹配较长的术语"""
+    alternatives = '|'.join(re.escape(term) for term in sorted(terms, key=len, reverse=True))
+    return re.compile(f'({_FONT_TAG})|({alternatives})', re.DOTALL)
+
+
+def highlight_terms(filename, term_colors, pattern=None):
+    """批量模式：一次遍历为文件中的全部术语添加背景色，并以原子方式写回一次
+
+    返回 {术语: 替换次数}。已有背景色标签内的文字不会重复处理。
+    """
+    pattern = pattern or build_term_pattern(term_colors)
+    counts = Counter()
+
+    def replace(match):
+        if match.group(1):
+            return match.group(1)
+        term = match.group(2)
+        counts[term] += 1
+        return f'<font style="background-color: {term_colors[term]}">{term}</font>'
+
+    with open(filename, 'r', encoding='utf-8') as f:
+        content = f.read()
+    new_content = pattern.sub(replace, content)
+    if counts:
+        write_atomic(filename, new_content)
+    return counts
+
+
+def run_batch(mapping_file, files):
+    """按映射文件批量处理多个 Markdown 文件"""
+    try:
+        term_colors = load_term_colors(mapping_file)
+    except (OSError, ValueError) as e:
+        print(f"❌ 读取映射文件失败: {str(e)}")
+        return False
+    if not term_colors:
+        print("⚠️ 映射文件中没有任何术语")
+        return False
+
+    files = files or get_md_files()
+    if not files:
+        print("⚠️ 当前目录下没有找到Markdown文件(.md)")
+        return False
+
+    pattern = build_term_pattern(term_colors)
+    ok = True
+    print("\n" + "=" * 40)
+    print(f"📚 已加载 {len(term_colors)} 个术语，开始批量处理 {len(files)} 个文件")
+    for filename in files:
+        try:
+            counts = highlight_terms(filename, term_colors, pattern)
+        except Exception as e:
+            print(f"❌ 处理文件 {filename} 时出错: {str(e)}")
+            ok = False
+            continue
+        print(f"📄 {filename}: 命中 {len(counts)} 个术语，共替换 {sum(counts.values())} 处")
+    print("=" * 40 + "\n")
+    return ok
+
+
 def select_file():
     """选择要处理的文件，只在程序开始时执行一次"""
     md_files = get_md_files()
@@ -153,4 +264,15 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description='Markdown 文本背景色修改工具（不带参数时进入交互模式）')
+    parser.add_argument('--batch', metavar='MAPPING',
+                        help='批量模式：从映射文件读取 术语=颜色，一次处理全部术语')
+    parser.add_argument('files', nargs='*', help='批量模式要处理的文件（默认当前目录下全部 .md 文件）')
+    args = parser.parse_args()
+
+    if args.batch:
+        run_batch(args.batch, args.files)
+    elif args.files:
+        parser.error('指定文件时需要同时使用 --batch')
+    else:
+        main()